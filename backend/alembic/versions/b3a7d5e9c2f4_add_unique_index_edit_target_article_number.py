@@ -0,0 +1,54 @@
+"""add unique index on article number for edit targets without article_id
+
+Revision ID: b3a7d5e9c2f4
+Revises: f1e2d3c4a1b2
+Create Date: 2025-10-29 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3a7d5e9c2f4'
+down_revision: Union[str, None] = 'f1e2d3c4a1b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 1) Remove duplicates by article number among targets without article_id (keep lowest id)
+    op.execute(
+        """
+        WITH d AS (
+            SELECT id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY user_id,
+                                    workspace_file_id,
+                                    conflicts_json->>'article'
+                       ORDER BY id
+                   ) rn
+            FROM edit_target
+            WHERE article_id IS NULL
+              AND conflicts_json->>'article' IS NOT NULL
+        )
+        DELETE FROM edit_target e
+        USING d
+        WHERE e.id = d.id AND d.rn > 1;
+        """
+    )
+
+    # 2) Partial unique index when article_id is unknown, so phase 1 can insert
+    #    with ON CONFLICT DO NOTHING instead of locking and checking per article
+    op.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_edit_target_article_number
+        ON edit_target (user_id, workspace_file_id, (conflicts_json->>'article'))
+        WHERE article_id IS NULL;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_edit_target_article_number;")
@@ -30,6 +30,10 @@ class AppSettings(BaseSettings):
 
 class DatabaseSettings(BaseSettings):
     URL: str
+    # Connection pool of the Celery worker engine (per worker process)
+    POOL_SIZE: int = 5
+    MAX_OVERFLOW: int = 10
+    POOL_RECYCLE: int = 1800
 
     model_config = SettingsConfigDict(env_prefix="DATABASE_", **COMMON_MODEL_CONFIG)
 
@@ -60,6 +64,17 @@ class LLMSettings(BaseSettings):
         validation_alias=AliasChoices("LLM_DEEPSEEK_BASE_URL", "DEEPSEEK_BASE_URL"),
     )
     LLM_MODEL: str = Field(default="deepseek-chat", validation_alias=AliasChoices("LLM_LLM_MODEL", "LLM_MODEL"))
+    MAX_INPUT_TOKENS: int = Field(
+        default=16000,
+        validation_alias=AliasChoices("LLM_MAX_INPUT_TOKENS", "MAX_INPUT_TOKENS"),
+    )
+    # Provider supports response_format={"type": "json_object"} (OpenAI, DeepSeek)
+    JSON_MODE: bool = Field(default=True, validation_alias=AliasChoices("LLM_JSON_MODE", "JSON_MODE"))
+    # Concurrent LLM requests per worker task
+    MAX_CONCURRENCY: int = Field(
+        default=6,
+        validation_alias=AliasChoices("LLM_MAX_CONCURRENCY", "MAX_CONCURRENCY"),
+    )
 
     model_config = SettingsConfigDict(env_prefix="LLM_", **COMMON_MODEL_CONFIG)
 
@@ -111,6 +126,18 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return self.DATABASE.URL
 
+    @property
+    def DATABASE_POOL_SIZE(self) -> int:
+        return self.DATABASE.POOL_SIZE
+
+    @property
+    def DATABASE_MAX_OVERFLOW(self) -> int:
+        return self.DATABASE.MAX_OVERFLOW
+
+    @property
+    def DATABASE_POOL_RECYCLE(self) -> int:
+        return self.DATABASE.POOL_RECYCLE
+
     @property
     def CELERY_BROKER_URL(self) -> str:
         return self.CELERY.BROKER_URL
@@ -147,6 +174,18 @@ class Settings(BaseSettings):
     def LLM_MODEL(self) -> str:
         return self.LLM.LLM_MODEL
 
+    @property
+    def LLM_MAX_INPUT_TOKENS(self) -> int:
+        return self.LLM.MAX_INPUT_TOKENS
+
+    @property
+    def LLM_JSON_MODE(self) -> bool:
+        return self.LLM.JSON_MODE
+
+    @property
+    def LLM_MAX_CONCURRENCY(self) -> int:
+        return self.LLM.MAX_CONCURRENCY
+
     @property
     def SMTP_HOST(self) -> str:
         return self.SMTP.HOST
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+import orjson
 
 from config import settings
 
@@ -13,7 +14,22 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
-engine = create_async_engine(database_url, echo=True, future=True)
+
+def json_serializer(obj) -> str:
+    """orjson encoder shared by the database engines and the Celery serializer"""
+    # Non-str dict keys are stringified like stdlib json does
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# JSONB columns (conflicts_json, metadata_json) go through orjson,
+# same as in the Celery worker engine
+engine = create_async_engine(
+    database_url,
+    echo=True,
+    future=True,
+    json_serializer=json_serializer,
+    json_deserializer=orjson.loads
+)
 
 async_session_maker = async_sessionmaker(
     engine, 
@@ -1,7 +1,6 @@
 import io
 import re
 from typing import List
-from docx import Document
 from sqlalchemy import func
 from models.document import TaxUnit, TaxUnitType
 import uuid
@@ -15,6 +14,8 @@ class DocumentParser:
     
     def extract_text_from_docx(self, content: bytes) -> str:
         """Extract plain text from DOCX file"""
+        from docx import Document
+        
         doc = Document(io.BytesIO(content))
         text = []
         for para in doc.paragraphs:
@@ -7,6 +7,7 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill
 import uuid
 import asyncio
+import logging
 import re
 
 from models.document import (
@@ -14,6 +15,8 @@ from models.document import (
 )
 from services.llm_service import LLMService
 
+logger = logging.getLogger(__name__)
+
 
 class ExportService:
     """
@@ -242,20 +245,14 @@ class ExportService:
                 if analysis:
                     effective_date = analysis.get("effective_date") or None
                     banking_flag = analysis.get("is_banking")
-                    try:
-                        print(f"[ExportMeta] Row {idx-1}: effective_date={effective_date}, is_banking={banking_flag}")
-                    except Exception:
-                        pass
+                    logger.debug("[ExportMeta] Row %d: effective_date=%s, is_banking=%s", idx - 1, effective_date, banking_flag)
             except Exception:
                 pass
             
             # Heuristic fallback for banking flag if LLM didn't return it
             if banking_flag is None:
                 banking_flag = detect_banking_local(instruction, fragment.after_text, fragment.before_text)
-                try:
-                    print(f"[ExportMeta] Row {idx-1}: banking_heuristic={banking_flag}")
-                except Exception:
-                    pass
+                logger.debug("[ExportMeta] Row %d: banking_heuristic=%s", idx - 1, banking_flag)
             
             # Heuristic fallback for date if LLM didn't return it
             if not effective_date:
@@ -273,23 +270,24 @@ class ExportService:
                     effective_date = None
             
             # Debug log
-            try:
-                print(f"[ExportDate] Row {idx-1}: article={article.article_number if article else '—'}, effective_date={effective_date}")
-            except Exception:
-                pass
+            logger.debug(
+                "[ExportDate] Row %d: article=%s, effective_date=%s",
+                idx - 1, article.article_number if article else '—', effective_date
+            )
             
             ws.cell(row=idx, column=5, value=effective_date or "")  # ДАТА ВСТУПЛЕНИЯ В ДЕЙСТВИЕ
             
             comment_text = ""
             try:
                 # Debug logs for diagnostics
-                try:
-                    print(f"[ExportSummary] Row {idx-1}: article={article.article_number if article else '—'}")
-                    print(f"[ExportSummary] BEFORE_LEN={len(fragment.before_text or '')}, AFTER_LEN={len(fragment.after_text or '')}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("[ExportSummary] Row %d: article=%s", idx - 1, article.article_number if article else '—')
+                    logger.debug(
+                        "[ExportSummary] BEFORE_LEN=%d, AFTER_LEN=%d",
+                        len(fragment.before_text or ''), len(fragment.after_text or '')
+                    )
                     if instruction:
-                        print(f"[ExportSummary] INSTR_LEN={len(instruction)}")
-                except Exception:
-                    pass
+                        logger.debug("[ExportSummary] INSTR_LEN=%d", len(instruction))
                 
                 comment_text = await llm_service.summarize_edit(
                     before_text=fragment.before_text or "",
@@ -1,24 +1,175 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, ClassVar, Tuple
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-import json
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+import httpx
+import orjson
 import re
-import os
-from pathlib import Path
+import tiktoken
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+import logging
+import threading
+
+# Settings load .env themselves (see config.settings.ENV_FILES)
+from config import settings
 
-# Load environment variables
-from dotenv import load_dotenv
+logger = logging.getLogger(__name__)
 
-import sys
-from pathlib import Path
+# Upper bound for the apply_edit_instruction result cache (oldest entries are evicted first)
+APPLY_CACHE_MAX_ENTRIES = 10_000
+# Keep-alive pool of the shared async client; workers reuse one event loop,
+# so connections (and their TLS sessions) survive across tasks
+LLM_HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=60)
 
-# Add app directory to path for imports
-sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-load_dotenv("/home/kit/Desktop/Lizon/diff-master/backend/.env")
+# Leading/trailing markdown fence around a whole response
+_MARKDOWN_FENCE_EDGES = re.compile(r'^```(?:json)?|```$')
 
-# Import settings after loading env
-from config import settings
+# Strict dd.mm.yyyy date in a model answer
+_DMY_DATE_RE = re.compile(r'(\d{1,2}\.\d{1,2}\.\d{4})')
+
+
+_EXTRACT_SYSTEM = """Ты - эксперт по анализу правок в юридических документах (Налоговый Кодекс РФ).
+
+Твоя задача: из текста правок извлечь структурированную информацию.
+
+Для каждой правки извлеки:
+1. "address" - адрес правки (например: "статья 6.1, пункт 7", "глава 2, статья 11")
+2. "instruction" - текст инструкции правки (например: "а) слова 'рабочий день' дополнить словами '...'")
+3. "full_text" - полный текст правки как есть
+
+ВАЖНО:
+- Адрес должен содержать статью/главу/пункт в том формате, как они упомянуты
+- Если в одном месте несколько правок (а), б), в)), раздели их на отдельные записи
+- Сохраняй оригинальный текст правок
+
+Верни результат в формате JSON array:
+[
+  {
+    "address": "статья 6.1, пункт 7",
+    "instruction": "а) слова 'рабочий день' дополнить словами 'календарный день'",
+    "full_text": "В пункте 7 статьи 6.1: а) слова 'рабочий день' дополнить словами 'календарный день'"
+  },
+  ...
+]
+"""
+
+# JSON mode only allows a top-level object, so the array is wrapped into {"edits": [...]}
+_EXTRACT_SYSTEM_JSON_MODE = _EXTRACT_SYSTEM.replace(
+    "Верни результат в формате JSON array:\n[",
+    'Верни результат в формате JSON object:\n{"edits": ['
+).rstrip() + "}\n"
+
+_APPLY_SYSTEM = """Ты - эксперт редактор юридических документов.
+
+Твоя задача: применить правку к тексту согласно инструкции.
+
+ВАЖНО:
+- Применяй правку ТОЧНО как указано в инструкции
+- Сохраняй форматирование и структуру текста
+- Если инструкция говорит "слова ... заменить словами ...", найди эти слова и замени
+- Если "дополнить словами", добавь слова в нужное место
+- Если "исключить слова", удали их
+- Если правку невозможно применить (текст не найден), верни исходный текст и укажи в начале: [ОШИБКА: текст не найден]
+
+Верни ТОЛЬКО измененный текст, без комментариев."""
+
+_MATCH_SYSTEM = """Ты помогаешь сопоставить адрес правки с полным путем в иерархии документа.
+
+Дан адрес правки (например: "статья 6.1, пункт 7") и список доступных путей.
+
+Найди наиболее подходящий путь из списка.
+
+Верни только путь или "неизвестно" если не можешь найти подходящий."""
+
+_PARSE_BY_ARTICLES_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """Проанализируй текст правок и создай JSON с номерами статей как ключами. 
+Для каждой статьи создай структурированное описание изменений в формате:
+
+Статья X.X (Название статьи)
+Пункт Y:
+- Детальное описание изменения 1
+- Детальное описание изменения 2
+
+Пример:
+{{
+    "6.1": "Статья 6.1 (Порядок исчисления сроков)\\nПункт 7:\\n- Дополнить после слов \\"рабочий день\\" словами \\", за исключением срока уплаты налогов\\"\\n- Дополнить новым абзацем, устанавливающим, что если последний день срока уплаты налога выпадает на выходной/праздничный день, то днем окончания срока считается предшествующий рабочий день",
+    "11": "Статья 11 (Институты, понятия и термины)\\nПункт 2:\\n- Изложить абзац 21 в новой редакции, уточняющей понятие \\"сезонное производство\\"\\n- Дополнить новым абзацем, определяющим понятие \\"Имущество\\" для целей НК РФ\\nПункт 5:\\n- Дополнить список организаций словами \\", государственную корпорацию \\"Агентство по страхованию вкладов\\"\\""
+}}"""),
+    ("user", "Проанализируй правки и структурируй по статьям:\n\n{content}")
+])
+
+_DETERMINE_SYSTEM = """Ты помогаешь определить, к какой статье относится правка.
+
+Дан адрес правки (например: "статья 6.1, пункт 7") и список доступных статей.
+
+Определи номер статьи из адреса и проверь, есть ли она в списке доступных.
+
+Верни только номер статьи (например: "6.1") или "неизвестно" если не можешь определить."""
+
+
+def _extract_json_array(text: str) -> Optional[str]:
+    """
+    Return the first JSON array inside a markdown code block (```json or ```)
+    
+    Linear scan for the matching closing bracket (skipping brackets inside
+    string literals) instead of a lazy DOTALL regex, so malformed LLM output
+    cannot trigger backtracking.
+    """
+    fence = text.find("```json")
+    if fence < 0:
+        fence = text.find("```")
+    if fence < 0:
+        return None
+    start = text.find("[", fence)
+    if start < 0:
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped = False
+    for pos in range(start, len(text)):
+        char = text[pos]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
+    return None
+
+
+@lru_cache(maxsize=1)
+def _get_token_encoding():
+    """Tokenizer used to budget prompt input (loaded lazily, BPE files are fetched on first use)"""
+    return tiktoken.encoding_for_model("gpt-4")
+
+
+def _truncate_to_token_budget(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens (Cyrillic takes ~2x more tokens than chars suggest)"""
+    try:
+        encoding = _get_token_encoding()
+    except Exception as e:
+        # BPE files could not be fetched or read; one character per token
+        # keeps the cut within the budget for Cyrillic text
+        logger.warning("[LLM] Tokenizer unavailable, truncating input by characters: %s", e)
+        return text[:max_tokens]
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    logger.debug("[LLM] Truncating input from %d to %d tokens", len(tokens), max_tokens)
+    return encoding.decode(tokens[:max_tokens])
 
 
 class LLMService:
@@ -27,10 +178,36 @@ class LLMService:
     Handles Phase 1 (extract edits) and Phase 2 (apply edits)
     """
     
+    _shared_clients: ClassVar[Optional[Tuple[ChatOpenAI, AsyncOpenAI]]] = None
+    _shared_clients_lock: ClassVar[threading.Lock] = threading.Lock()
+    
     def __init__(self):
+        # (before_text, instruction) digest -> after_text
+        self._apply_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        
+        # HTTP clients are process-wide so connection pools and TLS sessions are reused
+        self.llm, self.client = self._get_shared_clients()
+        
+        # Prompt templates are immutable, so compose the chains only once
+        parse_llm = self.llm
+        if settings.LLM_JSON_MODE:
+            parse_llm = self.llm.bind(response_format={"type": "json_object"})
+        self._parse_by_articles_chain = _PARSE_BY_ARTICLES_PROMPT | parse_llm
+    
+    @classmethod
+    def _get_shared_clients(cls) -> Tuple[ChatOpenAI, AsyncOpenAI]:
+        """Lazily build the LLM clients once per process"""
+        if cls._shared_clients is None:
+            with cls._shared_clients_lock:
+                if cls._shared_clients is None:
+                    cls._shared_clients = cls._build_clients()
+        return cls._shared_clients
+    
+    @staticmethod
+    def _build_clients() -> Tuple[ChatOpenAI, AsyncOpenAI]:
         # Use DeepSeek if API key is set, otherwise fall back to OpenAI
         if settings.DEEPSEEK_API_KEY:
-            self.llm = ChatOpenAI(
+            llm = ChatOpenAI(
                 model=settings.LLM_MODEL,
                 temperature=0,
                 openai_api_key=settings.DEEPSEEK_API_KEY,
@@ -38,16 +215,63 @@ class LLMService:
                 request_timeout=180,  # increased timeout to handle long edits
                 max_retries=1  # Only 1 retry
             )
-            print(f"[LLM] Initialized DeepSeek with model={settings.LLM_MODEL}")
+            client = AsyncOpenAI(
+                api_key=settings.DEEPSEEK_API_KEY,
+                base_url=settings.DEEPSEEK_BASE_URL,
+                timeout=180,
+                max_retries=1,
+                http_client=DefaultAsyncHttpxClient(limits=LLM_HTTP_LIMITS)
+            )
+            logger.debug("[LLM] Initialized DeepSeek with model=%s", settings.LLM_MODEL)
         else:
-            self.llm = ChatOpenAI(
+            llm = ChatOpenAI(
                 model=settings.LLM_MODEL,
                 temperature=0,
                 openai_api_key=settings.OPENAI_API_KEY,
                 request_timeout=180,  # increased timeout to handle long edits
                 max_retries=1  # Only 1 retry
             )
-            print(f"[LLM] Initialized OpenAI with model={settings.LLM_MODEL}")
+            client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=180,
+                max_retries=1,
+                http_client=DefaultAsyncHttpxClient(limits=LLM_HTTP_LIMITS)
+            )
+            logger.debug("[LLM] Initialized OpenAI with model=%s", settings.LLM_MODEL)
+        return llm, client
+    
+    async def _chat(self, system: str, user: str, **kwargs) -> str:
+        """
+        Single chat completion through the raw OpenAI client
+        
+        Skips the LangChain Runnable/callback layer on the hot Phase 1/2 paths.
+        """
+        response = await self.client.chat.completions.create(
+            model=settings.LLM_MODEL,
+            temperature=0,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
+            ],
+            **kwargs
+        )
+        return response.choices[0].message.content or ""
+    
+    async def _chat_stream(self, system: str, user: str, **kwargs) -> AsyncIterator[str]:
+        """Streaming variant of _chat, yields content deltas as they arrive"""
+        stream = await self.client.chat.completions.create(
+            model=settings.LLM_MODEL,
+            temperature=0,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
+            ],
+            stream=True,
+            **kwargs
+        )
+        async for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
     
     async def extract_edit_instructions(self, edits_text: str) -> List[Dict[str, Any]]:
         """
@@ -60,66 +284,43 @@ class LLMService:
             "full_text": "..."
         }
         """
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Ты - эксперт по анализу правок в юридических документах (Налоговый Кодекс РФ).
-
-Твоя задача: из текста правок извлечь структурированную информацию.
-
-Для каждой правки извлеки:
-1. "address" - адрес правки (например: "статья 6.1, пункт 7", "глава 2, статья 11")
-2. "instruction" - текст инструкции правки (например: "а) слова 'рабочий день' дополнить словами '...'")
-3. "full_text" - полный текст правки как есть
-
-ВАЖНО:
-- Адрес должен содержать статью/главу/пункт в том формате, как они упомянуты
-- Если в одном месте несколько правок (а), б), в)), раздели их на отдельные записи
-- Сохраняй оригинальный текст правок
-
-Верни результат в формате JSON array:
-[
-  {{
-    "address": "статья 6.1, пункт 7",
-    "instruction": "а) слова 'рабочий день' дополнить словами 'календарный день'",
-    "full_text": "В пункте 7 статьи 6.1: а) слова 'рабочий день' дополнить словами 'календарный день'"
-  }},
-  ...
-]
-"""),
-            ("user", "{edits_text}")
-        ])
-        
-        chain = prompt | self.llm
-        response = await chain.ainvoke({"edits_text": edits_text})
+        json_mode = settings.LLM_JSON_MODE
+        if json_mode:
+            response_text = await self._chat(
+                _EXTRACT_SYSTEM_JSON_MODE,
+                edits_text,
+                response_format={"type": "json_object"}
+            )
+        else:
+            response_text = await self._chat(_EXTRACT_SYSTEM, edits_text)
         
         # Parse JSON from response
         try:
-            content = response.content
+            content = response_text
             if not content:
-                print("LLM returned empty response")
+                logger.warning("LLM returned empty response")
                 return []
+            
+            if json_mode:
+                # JSON mode guarantees a bare object, no markdown to strip
+                return orjson.loads(content).get("edits", [])
                 
             # Extract JSON array from markdown code block if present
-            if "```json" in content:
-                content = re.search(r'```json\s*(\[.*?\])\s*```', content, re.DOTALL)
-                if content:
-                    content = content.group(1)
-            elif "```" in content:
-                content = re.search(r'```\s*(\[.*?\])\s*```', content, re.DOTALL)
-                if content:
-                    content = content.group(1)
+            if "```" in content:
+                content = _extract_json_array(content)
             
             if not content:
-                print("No JSON content found in LLM response")
+                logger.warning("No JSON content found in LLM response")
                 return []
                 
-            result = json.loads(content)
+            result = orjson.loads(content)
             return result
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse LLM response: {e}")
-            print(f"Response: {response.content}")
+        except orjson.JSONDecodeError as e:
+            logger.warning("Failed to parse LLM response: %s", e)
+            logger.debug("Response: %s", response_text)
             return []
         except Exception as e:
-            print(f"Unexpected error parsing LLM response: {e}")
+            logger.warning("Unexpected error parsing LLM response: %s", e)
             return []
     
     async def apply_edit_instruction(
@@ -135,38 +336,50 @@ class LLMService:
         - instruction: Инструкция правки (например: "а) слова 'рабочий день' дополнить словами 'календарный день'")
         
         Output: Измененный текст (after_text)
+        
+        Results are cached by exact (before_text, instruction) content, so
+        re-applying the same edit to the same fragment skips the LLM call.
         """
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Ты - эксперт редактор юридических документов.
-
-Твоя задача: применить правку к тексту согласно инструкции.
-
-ВАЖНО:
-- Применяй правку ТОЧНО как указано в инструкции
-- Сохраняй форматирование и структуру текста
-- Если инструкция говорит "слова ... заменить словами ...", найди эти слова и замени
-- Если "дополнить словами", добавь слова в нужное место
-- Если "исключить слова", удали их
-- Если правку невозможно применить (текст не найден), верни исходный текст и укажи в начале: [ОШИБКА: текст не найден]
-
-Верни ТОЛЬКО измененный текст, без комментариев."""),
-            ("user", """Оригинальный текст:
+        cache_key = hashlib.blake2b(
+            f"{before_text}\x00{instruction}".encode(), digest_size=16
+        ).digest()
+        cached = self._apply_cache.get(cache_key)
+        if cached is not None:
+            self._apply_cache.move_to_end(cache_key)
+            return cached
+        
+        chunks = [
+            chunk async for chunk in self.apply_edit_instruction_stream(before_text, instruction)
+        ]
+        after_text = "".join(chunks).strip()
+        
+        # Don't pin failed applications, a retry may succeed
+        if "[ОШИБКА:" not in after_text:
+            self._apply_cache[cache_key] = after_text
+            if len(self._apply_cache) > APPLY_CACHE_MAX_ENTRIES:
+                self._apply_cache.popitem(last=False)
+        return after_text
+    
+    async def apply_edit_instruction_stream(
+        self,
+        before_text: str,
+        instruction: str
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of apply_edit_instruction
+        
+        Yields chunks of after_text as the LLM generates them, so the caller
+        can start diffing before the full response has arrived.
+        """
+        user = f"""Оригинальный текст:
 {before_text}
 
 Инструкция правки:
 {instruction}
 
-Примени правку и верни измененный текст:""")
-        ])
-        
-        chain = prompt | self.llm
-        response = await chain.ainvoke({
-            "before_text": before_text,
-            "instruction": instruction
-        })
-        
-        after_text = response.content.strip()
-        return after_text
+Примени правку и верни измененный текст:"""
+        async for chunk in self._chat_stream(_APPLY_SYSTEM, user):
+            yield chunk
     
     async def match_address_to_breadcrumbs(
         self, 
@@ -186,36 +399,26 @@ class LLMService:
         if not available_breadcrumbs:
             return None
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Ты помогаешь сопоставить адрес правки с полным путем в иерархии документа.
-
-Дан адрес правки (например: "статья 6.1, пункт 7") и список доступных путей.
-
-Найди наиболее подходящий путь из списка.
-
-Верни только путь или "неизвестно" если не можешь найти подходящий."""),
-            ("user", """Адрес правки: {address}
+        breadcrumbs_text = "\n".join(available_breadcrumbs)
+        user = f"""Адрес правки: {address}
 
 Доступные пути:
-{available_breadcrumbs}
+{breadcrumbs_text}
 
-Найди наиболее подходящий путь:""")
-        ])
-        
-        chain = prompt | self.llm
-        response = await chain.ainvoke({
-            "address": address,
-            "available_breadcrumbs": "\n".join(available_breadcrumbs)
-        })
+Найди наиболее подходящий путь:"""
+        response_text = await self._chat(_MATCH_SYSTEM, user)
         
-        result = response.content.strip()
+        result_lower = response_text.strip().lower()
         
         # Check if result matches any available breadcrumb
-        for breadcrumb in available_breadcrumbs:
-            if result.lower() in breadcrumb.lower() or breadcrumb.lower() in result.lower():
-                return breadcrumb
-        
-        return None
+        return next(
+            (
+                breadcrumb for breadcrumb in available_breadcrumbs
+                if result_lower in (breadcrumb_lower := breadcrumb.lower())
+                or breadcrumb_lower in result_lower
+            ),
+            None
+        )
 
     async def analyze_change_metadata(
         self,
@@ -269,17 +472,16 @@ class LLMService:
                 "text": text_for_llm[:6000]
             })
             raw = (response.content or "").strip()
-            # Extract JSON if model wrapped it
-            import re as _re
+            # Extract JSON if model wrapped it: first "{" to last "}", no regex
             parsed = raw
-            m = _re.search(r'\{.*\}', raw, _re.DOTALL)
-            if m:
-                parsed = m.group(0)
-            data = json.loads(parsed)
+            start, end = raw.find("{"), raw.rfind("}")
+            if 0 <= start < end:
+                parsed = raw[start:end + 1]
+            data = orjson.loads(parsed)
             # Normalize fields
             eff = data.get("effective_date")
             if isinstance(eff, str):
-                m2 = _re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', eff)
+                m2 = _DMY_DATE_RE.search(eff)
                 data["effective_date"] = m2.group(1) if m2 else None
             else:
                 data["effective_date"] = None if eff in (None, "", "нет", "none") else eff
@@ -288,16 +490,10 @@ class LLMService:
                 data["confidence"] = float(data.get("confidence", 0.0))
             except Exception:
                 data["confidence"] = 0.0
-            try:
-                print(f"[ExportMeta] LLM_ANALYSIS: {data}")
-            except Exception:
-                pass
+            logger.debug("[ExportMeta] LLM_ANALYSIS: %s", data)
             return data
         except Exception as e:
-            try:
-                print(f"[ExportMeta] ERROR: {e}")
-            except Exception:
-                pass
+            logger.warning("[ExportMeta] ERROR: %s", e)
             return {}
 
     def parse_edits_by_articles_sync(self, edits_content: str) -> Dict[str, str]:
@@ -305,66 +501,72 @@ class LLMService:
         Parse edits and group them by articles using LLM (synchronous version)
         """
         try:
-            print(f"[LLM] Processing content of {len(edits_content)} characters")
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", """Проанализируй текст правок и создай JSON с номерами статей как ключами. 
-Для каждой статьи создай структурированное описание изменений в формате:
-
-Статья X.X (Название статьи)
-Пункт Y:
-- Детальное описание изменения 1
-- Детальное описание изменения 2
-
-Пример:
-{{
-    "6.1": "Статья 6.1 (Порядок исчисления сроков)\\nПункт 7:\\n- Дополнить после слов \\"рабочий день\\" словами \\", за исключением срока уплаты налогов\\"\\n- Дополнить новым абзацем, устанавливающим, что если последний день срока уплаты налога выпадает на выходной/праздничный день, то днем окончания срока считается предшествующий рабочий день",
-    "11": "Статья 11 (Институты, понятия и термины)\\nПункт 2:\\n- Изложить абзац 21 в новой редакции, уточняющей понятие \\"сезонное производство\\"\\n- Дополнить новым абзацем, определяющим понятие \\"Имущество\\" для целей НК РФ\\nПункт 5:\\n- Дополнить список организаций словами \\", государственную корпорацию \\"Агентство по страхованию вкладов\\"\\""
-}}"""),
-                ("user", "Проанализируй правки и структурируй по статьям:\n\n{content}")
-            ])
-            
-            chain = prompt | self.llm
+            logger.debug("[LLM] Processing content of %d characters", len(edits_content))
+            edits_content = _truncate_to_token_budget(edits_content, settings.LLM_MAX_INPUT_TOKENS)
+            chain = self._parse_by_articles_chain
             
             # Use synchronous invoke instead of async
             try:
-                print(f"[LLM] Sending synchronous request to LLM...")
+                logger.debug("[LLM] Sending synchronous request to LLM...")
                 response = chain.invoke({"content": edits_content})
             except Exception as e:
-                print(f"[LLM] Error during LLM request: {e}")
+                logger.warning("[LLM] Error during LLM request: %s", e)
                 return {}
             
-            if not response or not response.content:
-                print(f"[LLM] Empty response from LLM")
-                return {}
-            
-            print(f"[LLM] Received response from LLM: {len(response.content)} characters")
-            print(f"[LLM] Response preview: {response.content[:200]}...")
+            return self._parse_articles_response(response)
+                
+        except Exception as e:
+            logger.warning("[LLM] Error parsing edits by articles: %s", e)
+            return {}
+
+    async def parse_edits_by_articles(self, edits_content: str) -> Dict[str, str]:
+        """
+        Parse edits and group them by articles using LLM (async version)
+        
+        Same as parse_edits_by_articles_sync, but awaits the LLM call so the
+        event loop keeps serving other requests meanwhile.
+        """
+        try:
+            logger.debug("[LLM] Processing content of %d characters", len(edits_content))
+            edits_content = _truncate_to_token_budget(edits_content, settings.LLM_MAX_INPUT_TOKENS)
+            chain = self._parse_by_articles_chain
             
-            # Parse JSON response
             try:
-                response_text = response.content.strip()
-                
-                # Remove markdown code blocks if present
-                if response_text.startswith("```json"):
-                    response_text = response_text[7:]  # Remove ```json
-                if response_text.startswith("```"):
-                    response_text = response_text[3:]   # Remove ```
-                if response_text.endswith("```"):
-                    response_text = response_text[:-3]  # Remove trailing ```
-                
-                response_text = response_text.strip()
-                
-                parsed_result = json.loads(response_text)
-                print(f"[LLM] Successfully parsed {len(parsed_result)} article groups")
-                return parsed_result
-            except json.JSONDecodeError as e:
-                print(f"[LLM] Failed to parse JSON response: {e}")
-                print(f"[LLM] Raw response: {response.content}")
-                print(f"[LLM] Processed response_text: {response_text}")
+                logger.debug("[LLM] Sending async request to LLM...")
+                response = await chain.ainvoke({"content": edits_content})
+            except Exception as e:
+                logger.warning("[LLM] Error during LLM request: %s", e)
                 return {}
+            
+            return self._parse_articles_response(response)
                 
         except Exception as e:
-            print(f"[LLM] Error parsing edits by articles: {e}")
+            logger.warning("[LLM] Error parsing edits by articles: %s", e)
+            return {}
+
+    def _parse_articles_response(self, response) -> Dict[str, str]:
+        """Parse the JSON object returned by the parse-by-articles chain"""
+        if not response or not response.content:
+            logger.warning("[LLM] Empty response from LLM")
+            return {}
+        
+        logger.debug("[LLM] Received response from LLM: %d characters", len(response.content))
+        
+        # Parse JSON response
+        try:
+            response_text = response.content.strip()
+            
+            # Remove markdown code blocks if present (JSON mode never emits them)
+            if not settings.LLM_JSON_MODE:
+                response_text = _MARKDOWN_FENCE_EDGES.sub("", response_text).strip()
+            
+            parsed_result = orjson.loads(response_text)
+            logger.debug("[LLM] Successfully parsed %d article groups", len(parsed_result))
+            return parsed_result
+        except orjson.JSONDecodeError as e:
+            logger.warning("[LLM] Failed to parse JSON response: %s", e)
+            logger.debug("[LLM] Raw response: %s", response.content)
+            logger.debug("[LLM] Processed response_text: %s", response_text)
             return {}
 
     async def determine_target_article(
@@ -384,28 +586,15 @@ class LLMService:
         if not available_articles:
             return None
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Ты помогаешь определить, к какой статье относится правка.
+        articles_text = ", ".join(available_articles)
+        user = f"""Адрес правки: {address}
 
-Дан адрес правки (например: "статья 6.1, пункт 7") и список доступных статей.
+Доступные статьи: {articles_text}
 
-Определи номер статьи из адреса и проверь, есть ли она в списке доступных.
-
-Верни только номер статьи (например: "6.1") или "неизвестно" если не можешь определить."""),
-            ("user", """Адрес правки: {address}
-
-Доступные статьи: {available_articles}
-
-Определи номер статьи:""")
-        ])
-        
-        chain = prompt | self.llm
-        response = await chain.ainvoke({
-            "address": address,
-            "available_articles": ", ".join(available_articles)
-        })
+Определи номер статьи:"""
+        response_text = await self._chat(_DETERMINE_SYSTEM, user)
         
-        result = response.content.strip()
+        result = response_text.strip()
         
         # Check if result is in available articles
         if result in available_articles:
@@ -513,17 +702,15 @@ class LLMService:
         article_label = f"Статья {article_number}" if article_number else "Статья"
         
         # Debug log for diagnostics
-        try:
-            print(
-                f"[ExportSummary] {article_label}: before_len={len(before_text or '')}, after_len={len(after_text or '')}, "
-                f"changed_blocks={blocks}, instr_len={len(instruction or '')}"
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[ExportSummary] %s: before_len=%d, after_len=%d, changed_blocks=%d, instr_len=%d",
+                article_label, len(before_text or ''), len(after_text or ''), blocks, len(instruction or '')
             )
-            print(f"[ExportSummary] BEFORE_EXCERPT: {before_short[:400]!r}")
-            print(f"[ExportSummary] AFTER_EXCERPT: {after_short[:400]!r}")
+            logger.debug("[ExportSummary] BEFORE_EXCERPT: %r", before_short[:400])
+            logger.debug("[ExportSummary] AFTER_EXCERPT: %r", after_short[:400])
             if instruction_short:
-                print(f"[ExportSummary] INSTRUCTION: {instruction_short[:300]!r}")
-        except Exception:
-            pass
+                logger.debug("[ExportSummary] INSTRUCTION: %r", instruction_short[:300])
         
         prompt = ChatPromptTemplate.from_messages([
             ("system", """Ты выступаешь как юрист‑редактор. 
@@ -559,11 +746,8 @@ class LLMService:
                 summary = summary[:400].rstrip() + " …"
             # Safety: strip accidental code fences or formatting
             summary = summary.replace("```", "").strip()
-            try:
-                print(f"[ExportSummary] LLM_SUMMARY: {summary!r}")
-                print(f"[ExportSummary] DIFF_STATS: {stats}")
-            except Exception:
-                pass
+            logger.debug("[ExportSummary] LLM_SUMMARY: %r", summary)
+            logger.debug("[ExportSummary] DIFF_STATS: %s", stats)
             
             # Guardrail: if LLM утверждает, что изменений нет, а diff их показывает — переписываем комментарий
             lower = summary.lower()
@@ -581,10 +765,7 @@ class LLMService:
                         key_snippet = line.strip()
                         break
                 rule_based = f"{article_label}: изменения обнаружены — добавлено {added} симв., удалено {deleted}, изменено {replaced}. Пример: {key_snippet[:160]}".strip()
-                try:
-                    print(f"[ExportSummary] OVERRIDDEN_SUMMARY: {rule_based!r}")
-                except Exception:
-                    pass
+                logger.debug("[ExportSummary] OVERRIDDEN_SUMMARY: %r", rule_based)
                 return rule_based
             return summary or "Краткое описание изменения недоступно"
         except Exception as e:
@@ -633,7 +814,7 @@ class LLMService:
             response = await chain.ainvoke({"text": snippet})
             content = (response.content or "").strip()
             # Extract strict dd.mm.yyyy
-            m = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', content)
+            m = _DMY_DATE_RE.search(content)
             if m:
                 return m.group(1)
         except Exception:
@@ -1,7 +1,209 @@
+import codecs
+import hashlib
 import io
+import logging
+import multiprocessing
+import os
 import re
-from typing import Dict, Optional, List
-from docx import Document
+import sys
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import wraps
+from typing import Dict, Iterator, Optional, List
+from charset_normalizer import from_bytes
+
+logger = logging.getLogger(__name__)
+
+
+EXTRACT_CACHE_MAX_ENTRIES = 64
+# Below this many edits the process pool costs more than it saves
+PARALLEL_GROUPING_MIN_EDITS = 64
+
+# Результаты extract_edits_for_review по хэшу содержимого файла (LRU)
+_extract_cache: "OrderedDict[bytes, Dict[str, str]]" = OrderedDict()
+_CACHE_STATS = {"hits": 0, "misses": 0}
+
+# WordprocessingML tags used when streaming paragraphs out of a DOCX
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY = _W_NS + 'body'
+_W_P = _W_NS + 'p'
+_W_R = _W_NS + 'r'
+_W_HYPERLINK = _W_NS + 'hyperlink'
+_W_T = _W_NS + 't'
+_W_TAB = _W_NS + 'tab'
+_W_BR = _W_NS + 'br'
+_W_CR = _W_NS + 'cr'
+_W_NO_BREAK_HYPHEN = _W_NS + 'noBreakHyphen'
+_W_PTAB = _W_NS + 'ptab'
+_W_TYPE = _W_NS + 'type'
+_OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+_PACKAGE_RELS_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Article header line: "Статья 1. Title" or "Статья 11.3. Title"
+# Shared by parse_document_structure and parse_txt_structure. Only meant for
+# .match() on a single stripped line: match() already anchors at the start, so
+# there is no '^' that would silently change meaning under re.MULTILINE, and
+# \s may cross line breaks if it is ever applied to a whole text.
+_ARTICLE_HEADER_RE = re.compile(r'Статья\s+(\d+(?:\.\d+)?)\.\s*(.*)', re.IGNORECASE)
+
+# Local file header signature every DOCX (zip) starts with
+_ZIP_MAGIC = b'PK\x03\x04'
+
+# Encodings tried in order when charset detection gives no usable result
+_LEGACY_ENCODINGS = ['utf-8', 'cp1251', 'windows-1251', 'latin1']
+# How much of a text file is sampled for charset detection
+_CHARSET_SAMPLE_SIZE = 64 * 1024
+
+# Service lines to skip in document structure (ConsultantPlus banners, copyright)
+_SERVICE_LINE_RE = re.compile(r'консультантплюс|consultantplus|©|copyright', re.IGNORECASE)
+
+# Patterns below are lowercase and case-sensitive: they run on _fold_case(text)
+# once instead of folding case per character under re.IGNORECASE.
+
+# Candidate article header line for parse_txt_structure (checked against
+# _ARTICLE_HEADER_RE after stripping, like a line of the line-by-line parser)
+_TXT_HEADER_LINE_RE = re.compile(r'^[^\S\n]*статья[^\n]*', re.MULTILINE)
+
+# Все маркеры статей для _split_by_articles одной альтернацией (один проход по
+# тексту), номер группы = приоритет:
+# 1 - заголовок "Статья N" в начале строки, 2 - ссылка в любом падеже,
+# 3 - строка с голым номером ("1:", "11.3-"), 4 - "статья N" в середине строки
+# или "статье N" (учитываются, только если маркеров 1-3 в тексте нет; номер
+# берётся опережающей проверкой, чтобы не съедать маркер 3 на следующей строке).
+# Позиция статьи берётся из первого вхождения с наивысшим приоритетом, чтобы
+# заголовок не перебивался более ранней ссылкой на статью с тем же номером.
+_SPLIT_ARTICLE_RE = re.compile(
+    r'^статья\s+(\d+(?:\.\d+)?)'
+    r'|(?:(?:в\s+статье|стать(?:ей|ях|и|ю)|статей)\s+|ст\.\s*)(\d+(?:\.\d+)?)'
+    r'|^(\d+(?:\.\d+)?)\s*[:\-]'
+    r'|стать[яе]\s+(?=(\d+(?:\.\d+)?))',
+    re.MULTILINE
+)
+_WEAK_REF_PRIORITY = 4
+
+# Ссылка на статью в любом падеже: "статья 1", "в статье 1", "статьей 1", "ст. 1", ...
+_ARTICLE_REF_RE = re.compile(
+    r'(?:(?:стать(?:ей|ях|я|е|и|ю)|статей)\s+|ст\.\s*)(\d+(?:\.\d+)?)'
+)
+
+# Line that starts a new edit (leading whitespace allowed, as lines are stripped):
+# numbered lists "1. ", "2) ", lettered lists "а) ", bullets "- ", "• ",
+# and common edit verbs
+_EDIT_START_RE = re.compile(
+    r'^[^\S\n]*(?:\d+[.)]|[а-я]\)|[-•]'
+    r'|в[^\S\n]+статье|исключить|дополнить|заменить|изложить|внести)',
+    re.MULTILINE
+)
+
+
+def _fold_case(text: str) -> str:
+    """
+    Lowercase text for the case-sensitive patterns, keeping offsets valid
+    
+    Match positions on the folded text are used to slice the original one, so
+    characters whose lowercase form is longer (e.g. "İ") are left as they are.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+
+def _detect_and_decode(content: bytes) -> Optional[str]:
+    """
+    Decode a text file with the charset detected from a prefix sample
+    
+    Returns None when detection fails or the decoded text has no article
+    markers, so callers can fall back to trying _LEGACY_ENCODINGS one by one.
+    """
+    # Fast paths: UTF-8 with BOM and pure ASCII need no detection
+    if content[:3] == codecs.BOM_UTF8:
+        return content.decode('utf-8-sig')
+    if content.isascii():
+        return content.decode('ascii')
+    
+    sample = content[:_CHARSET_SAMPLE_SIZE]
+    if len(content) > _CHARSET_SAMPLE_SIZE:
+        # Не режем многобайтовый символ на границе выборки
+        sample = sample[:sample.rfind(b'\n') + 1] or sample
+    
+    best = from_bytes(sample).best()
+    if best is None:
+        return None
+    
+    try:
+        text_content = content.decode(best.encoding)
+    except (UnicodeDecodeError, LookupError):
+        return None
+    
+    if 'Статья' in text_content or 'статья' in text_content:
+        logger.debug("[Parsing] Detected encoding %s", best.encoding)
+        return text_content
+    return None
+
+
+def _main_document_part(archive: zipfile.ZipFile) -> str:
+    """Resolve the main document part name from the package relationships"""
+    from lxml import etree
+    
+    try:
+        rels = etree.fromstring(archive.read('_rels/.rels'))
+        for rel in rels.iter(_PACKAGE_RELS_NS + 'Relationship'):
+            if rel.get('Type') == _OFFICE_DOCUMENT_REL:
+                return rel.get('Target').lstrip('/')
+    except KeyError:
+        pass
+    return 'word/document.xml'
+
+
+def _run_text(run) -> str:
+    """Text of a w:r element, same rules as python-docx Run.text"""
+    parts = []
+    for child in run:
+        if child.tag == _W_T:
+            parts.append(child.text or '')
+        elif child.tag == _W_TAB or child.tag == _W_PTAB:
+            parts.append('\t')
+        elif child.tag == _W_NO_BREAK_HYPHEN:
+            parts.append('-')
+        elif child.tag == _W_CR or (child.tag == _W_BR and child.get(_W_TYPE, 'textWrapping') == 'textWrapping'):
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _iter_docx_paragraphs(docx_content: bytes) -> Iterator[str]:
+    """
+    Stream the text of top-level body paragraphs of a DOCX file
+    
+    Equivalent to iterating Document(...).paragraphs, but parses
+    word/document.xml incrementally and drops each paragraph once it has been
+    yielded, so memory stays bounded by a single paragraph (or table) instead
+    of the whole object tree.
+    """
+    # lxml is only needed for DOCX input, keep it off the TXT import path
+    from lxml import etree
+    
+    with zipfile.ZipFile(io.BytesIO(docx_content)) as archive:
+        with archive.open(_main_document_part(archive)) as document_xml:
+            for _, paragraph in etree.iterparse(document_xml, events=('end',), tag=_W_P):
+                body = paragraph.getparent()
+                # Paragraphs nested in tables etc. are not part of Document.paragraphs
+                if body is None or body.tag != _W_BODY:
+                    continue
+                
+                parts = []
+                for child in paragraph.iterchildren(_W_R, _W_HYPERLINK):
+                    if child.tag == _W_R:
+                        parts.append(_run_text(child))
+                    else:
+                        parts.extend(_run_text(run) for run in child.iterchildren(_W_R))
+                yield ''.join(parts)
+                
+                # Free this paragraph and everything before it in the body
+                paragraph.clear()
+                while paragraph.getprevious() is not None:
+                    del body[0]
 
 
 def parse_document_structure(docx_content: bytes) -> Optional[Dict[str, Dict[str, str]]]:
@@ -20,58 +222,57 @@ def parse_document_structure(docx_content: bytes) -> Optional[Dict[str, Dict[str
         Returns None if parsing fails.
     """
     try:
-        doc = Document(io.BytesIO(docx_content))
         articles = {}
         
-        # Pattern to match article headers: "Статья 1. Title" or "Статья 11.3. Title"
-        article_pattern = re.compile(r'^Статья\s+(\d+(?:\.\d+)?)\.\s*(.*)', re.IGNORECASE)
-        
         current_article = None
-        current_content = []
+        current_content = io.StringIO()
         
-        for para in doc.paragraphs:
-            text = para.text.strip()
+        for text in _iter_docx_paragraphs(docx_content):
+            text = text.strip()
             if not text:
                 continue
                 
             # Skip service lines (ConsultantPlus, etc.)
-            if any(service in text.lower() for service in ['консультантплюс', 'consultantplus', '©', 'copyright']):
+            if _SERVICE_LINE_RE.search(text):
                 continue
                 
             # Check if this is an article header
-            match = article_pattern.match(text)
+            match = _ARTICLE_HEADER_RE.match(text)
             if match:
                 # Save previous article if exists
                 if current_article:
                     articles[current_article['number']] = {
                         'title': current_article['title'],
-                        'content': '\n'.join(current_content).strip()
+                        'content': current_content.getvalue().strip()
                     }
                 
                 # Start new article
-                article_number = match.group(1)
+                article_number = sys.intern(match.group(1))
                 article_title = match.group(2)
                 current_article = {
                     'number': article_number,
                     'title': article_title
                 }
-                current_content = [text]  # Include the header line
+                current_content = io.StringIO()
+                current_content.write(text)  # Include the header line
+                current_content.write('\n')
             else:
                 # Add content to current article
                 if current_article:
-                    current_content.append(text)
+                    current_content.write(text)
+                    current_content.write('\n')
         
         # Save the last article
         if current_article:
             articles[current_article['number']] = {
                 'title': current_article['title'],
-                'content': '\n'.join(current_content).strip()
+                'content': current_content.getvalue().strip()
             }
         
         return articles if articles else None
         
     except Exception as e:
-        print(f"Error parsing document structure: {e}")
+        logger.warning("Error parsing document structure: %s", e)
         return None
 
 
@@ -88,60 +289,70 @@ def parse_txt_structure(txt_content: str) -> Optional[Dict[str, Dict[str, str]]]
         Returns None if parsing fails.
     """
     try:
-        articles = {}
-        
-        # Pattern to match article headers
-        article_pattern = re.compile(r'^Статья\s+(\d+(?:\.\d+)?)\.\s*(.*)', re.IGNORECASE)
-        
-        current_article = None
-        current_content = []
-        
-        for line in txt_content.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-                
+        # Заголовки ищем одним проходом по всему тексту, а не построчно;
+        # строки разбираются только внутри найденных статей
+        headers = []
+        for candidate in _TXT_HEADER_LINE_RE.finditer(_fold_case(txt_content)):
+            line = txt_content[candidate.start():candidate.end()].strip()
+            
             # Skip service lines
-            if any(service in line.lower() for service in ['консультантплюс', 'consultantplus', '©', 'copyright']):
+            if _SERVICE_LINE_RE.search(line):
                 continue
-                
-            # Check if this is an article header
-            match = article_pattern.match(line)
+            
+            match = _ARTICLE_HEADER_RE.match(line)
             if match:
-                # Save previous article if exists
-                if current_article:
-                    articles[current_article['number']] = {
-                        'title': current_article['title'],
-                        'content': '\n'.join(current_content).strip()
-                    }
-                
-                # Start new article
-                article_number = match.group(1)
-                article_title = match.group(2)
-                current_article = {
-                    'number': article_number,
-                    'title': article_title
-                }
-                current_content = [line]  # Include the header line
-            else:
-                # Add content to current article
-                if current_article:
-                    current_content.append(line)
+                headers.append((candidate.start(), match))
         
-        # Save the last article
-        if current_article:
-            articles[current_article['number']] = {
-                'title': current_article['title'],
-                'content': '\n'.join(current_content).strip()
+        articles = {}
+        for i, (start_pos, match) in enumerate(headers):
+            end_pos = headers[i + 1][0] if i + 1 < len(headers) else len(txt_content)
+            
+            # Header line plus non-empty, non-service lines up to the next header
+            lines = [
+                line for line in map(str.strip, txt_content[start_pos:end_pos].split('\n'))
+                if line and not _SERVICE_LINE_RE.search(line)
+            ]
+            articles[sys.intern(match.group(1))] = {
+                'title': match.group(2),
+                'content': '\n'.join(lines).strip()
             }
         
         return articles if articles else None
         
     except Exception as e:
-        print(f"Error parsing TXT document structure: {e}")
+        logger.warning("Error parsing TXT document structure: %s", e)
         return None
 
 
+def _cached_by_content(func):
+    """
+    Memoize a parser of uploaded file content by blake2b digest of the content
+    
+    Re-submitting the same file for review skips unzip, decode and article
+    splitting. Callers get a copy, so mutating the result never touches the cache.
+    """
+    @wraps(func)
+    def wrapper(content, *args, **kwargs):
+        raw = content if isinstance(content, bytes) else str(content).encode('utf-8')
+        cache_key = hashlib.blake2b(raw, digest_size=16, person=type(content).__name__.encode()[:16]).digest()
+        
+        cached = _extract_cache.get(cache_key)
+        if cached is not None:
+            _extract_cache.move_to_end(cache_key)
+            _CACHE_STATS["hits"] += 1
+            return dict(cached)
+        
+        _CACHE_STATS["misses"] += 1
+        result = func(content, *args, **kwargs)
+        _extract_cache[cache_key] = dict(result)
+        if len(_extract_cache) > EXTRACT_CACHE_MAX_ENTRIES:
+            _extract_cache.popitem(last=False)
+        return result
+    
+    return wrapper
+
+
+@_cached_by_content
 def extract_edits_for_review(content, file_type: str = "file") -> Dict[str, str]:
     """
     Extract edits by article for user review and approval
@@ -159,57 +370,65 @@ def extract_edits_for_review(content, file_type: str = "file") -> Dict[str, str]
         }
     """
     try:
-        print(f"[Parsing] Extracting edits for review, file_type={file_type}, content_type={type(content)}")
+        logger.debug("[Parsing] Extracting edits for review, file_type=%s, content_type=%s", file_type, type(content))
         
         # Handle different content types
         if isinstance(content, bytes):
             # Check if this looks like a binary file (e.g., .docx)
-            if b'[Content_Types].xml' in content or b'word/' in content or b'PK' in content[:4]:
-                print(f"[Parsing] Binary file detected (likely .docx), attempting to parse as DOCX")
+            if content[:4] == _ZIP_MAGIC:
+                logger.debug("[Parsing] Binary file detected (likely .docx), attempting to parse as DOCX")
                 try:
-                    text_content = _extract_text_from_docx(content)
+                    # Text extraction and article splitting in one pass
+                    articles = _split_docx_by_articles(content)
                 except Exception as e:
-                    print(f"[Parsing] Failed to parse as DOCX: {e}")
+                    logger.warning("[Parsing] Failed to parse as DOCX: %s", e)
                     return {"unknown": f"Не удалось обработать файл .docx: {str(e)}"}
+                
+                if articles is None:
+                    logger.debug("[Parsing] Content doesn't appear to contain legal articles")
+                    return {"unknown": "Файл не содержит правки в формате статей. Пожалуйста, загрузите текстовый файл с правками."}
+                
+                logger.debug("[Parsing] Final result: %d articles found", len(articles))
+                return articles
             else:
-                # Try different encodings for text files
-                text_content = None
-                for encoding in ['utf-8', 'cp1251', 'windows-1251', 'latin1']:
-                    try:
-                        text_content = content.decode(encoding)
-                        # Check if this looks like a text file with articles
-                        if 'Статья' in text_content or 'статья' in text_content:
-                            print(f"[Parsing] Successfully decoded with {encoding}")
-                            break
-                    except UnicodeDecodeError:
-                        continue
+                # Decode once with the detected charset, try encodings one by one otherwise
+                text_content = _detect_and_decode(content)
+                if text_content is None:
+                    for encoding in _LEGACY_ENCODINGS:
+                        try:
+                            text_content = content.decode(encoding)
+                            # Check if this looks like a text file with articles
+                            if 'Статья' in text_content or 'статья' in text_content:
+                                logger.debug("[Parsing] Successfully decoded with %s", encoding)
+                                break
+                        except UnicodeDecodeError:
+                            continue
                 
                 if text_content is None:
                     # If no encoding worked, use latin1 with error replacement
                     text_content = content.decode('latin1', errors='replace')
-                    print(f"[Parsing] Used latin1 with error replacement")
+                    logger.debug("[Parsing] Used latin1 with error replacement")
         else:
             # content is already a string
             text_content = str(content)
         
-        print(f"[Parsing] Extracted text content: {len(text_content)} characters")
-        print(f"[Parsing] First 200 chars: {text_content[:200]}...")
+        logger.debug("[Parsing] Extracted text content: %d characters", len(text_content))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[Parsing] First 200 chars: %s...", text_content[:200])
         
         # Check if the content looks like legal text with articles
         if not ('Статья' in text_content or 'статья' in text_content or 'Внести' in text_content):
-            print(f"[Parsing] Content doesn't appear to contain legal articles")
+            logger.debug("[Parsing] Content doesn't appear to contain legal articles")
             return {"unknown": "Файл не содержит правки в формате статей. Пожалуйста, загрузите текстовый файл с правками."}
         
         # Split by articles
         articles = _split_by_articles(text_content)
         
-        print(f"[Parsing] Final result: {len(articles)} articles found")
+        logger.debug("[Parsing] Final result: %d articles found", len(articles))
         return articles
         
     except Exception as e:
-        print(f"Error extracting edits for review: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error extracting edits for review: %s", e)
         return {"unknown": f"Ошибка парсинга файла: {str(e)}"}
 
 
@@ -235,16 +454,18 @@ def parse_and_group_edits(content: bytes, file_type: str = "docx") -> Dict[str,
             text_content = _extract_text_from_docx(content)
         else:  # txt
             if isinstance(content, bytes):
-                # Try different encodings
-                for encoding in ['utf-8', 'cp1251', 'windows-1251', 'latin1']:
-                    try:
-                        text_content = content.decode(encoding)
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                else:
-                    # If all encodings fail, use utf-8 with errors='replace'
-                    text_content = content.decode('utf-8', errors='replace')
+                # Decode once with the detected charset, try encodings one by one otherwise
+                text_content = _detect_and_decode(content)
+                if text_content is None:
+                    for encoding in _LEGACY_ENCODINGS:
+                        try:
+                            text_content = content.decode(encoding)
+                            break
+                        except UnicodeDecodeError:
+                            continue
+                    else:
+                        # If all encodings fail, use utf-8 with errors='replace'
+                        text_content = content.decode('utf-8', errors='replace')
             else:
                 text_content = content
         
@@ -257,27 +478,90 @@ def parse_and_group_edits(content: bytes, file_type: str = "docx") -> Dict[str,
         return grouped_edits
         
     except Exception as e:
-        print(f"Error parsing and grouping edits: {e}")
+        logger.warning("Error parsing and grouping edits: %s", e)
         return {"unknown": [f"Ошибка парсинга файла: {str(e)}"]}
 
 
 def _extract_text_from_docx(content: bytes) -> str:
     """Extract text content from DOCX file"""
     try:
-        doc = Document(io.BytesIO(content))
         paragraphs = []
         
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
+        for text in _iter_docx_paragraphs(content):
+            text = text.strip()
             if text:
                 paragraphs.append(text)
         
         return '\n'.join(paragraphs)
     except Exception as e:
-        print(f"Error extracting text from DOCX: {e}")
+        logger.warning("Error extracting text from DOCX: %s", e)
         return ""
 
 
+def _record_article_marker(match, position, article_priorities: Dict[str, int],
+                           article_positions: Dict[str, object]) -> None:
+    """Keep the marker if it is the first one of the highest priority for its article"""
+    priority = match.lastindex
+    article_num = sys.intern(match.group(priority))
+    # Сохраняем позицию первого упоминания статьи (заголовки важнее ссылок)
+    if priority < article_priorities.get(article_num, _WEAK_REF_PRIORITY + 1):
+        article_priorities[article_num] = priority
+        article_positions[article_num] = position
+
+
+def _scan_article_markers(text: str, article_priorities: Dict[str, int], article_positions: Dict[str, object]) -> None:
+    """Record the first highest-priority marker of every article found in text"""
+    for match in _SPLIT_ARTICLE_RE.finditer(_fold_case(text)):
+        _record_article_marker(match, match.start(), article_priorities, article_positions)
+
+
+def _scan_paragraph_markers(paragraph: str, following: Optional[str], start: int, paragraph_index: int,
+                            article_priorities: Dict[str, int], article_positions: Dict[str, object]) -> int:
+    """
+    Record the article markers that start in a case-folded paragraph
+    
+    Paragraphs are stripped and non-empty, so a marker spans one paragraph
+    break at most ("ст." / "5 ..."): scanning the paragraph joined with the
+    following one (None for the last paragraph) from offset start finds
+    exactly the markers of the '\n'-joined text. Positions are
+    (paragraph_index, offset) pairs. Returns the offset in following where
+    its own scan has to start.
+    """
+    text = paragraph if following is None else f'{paragraph}\n{following}'
+    limit = len(paragraph)
+    resume = 0
+    for match in _SPLIT_ARTICLE_RE.finditer(text, start):
+        if match.start() > limit:
+            break
+        _record_article_marker(match, (paragraph_index, match.start()), article_priorities, article_positions)
+        resume = max(0, match.end() - limit - 1)
+    return resume
+
+
+def _order_found_articles(article_priorities: Dict[str, int], article_positions: Dict[str, object]) -> List[tuple]:
+    """
+    Pick the article markers to split on and order them by position in the text
+    
+    Returns (position, article_num) pairs sorted by position.
+    """
+    # Слабые ссылки используются, только если в тексте нет заголовков и явных ссылок
+    if any(priority < _WEAK_REF_PRIORITY for priority in article_priorities.values()):
+        found = [
+            (article_positions[article_num], article_num)
+            for article_num, priority in article_priorities.items()
+            if priority < _WEAK_REF_PRIORITY
+        ]
+    else:
+        found = [(position, article_num) for article_num, position in article_positions.items()]
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[Parsing] Found article references: %s", sorted(article_num for _, article_num in found))
+    
+    # Сортируем статьи по позиции в тексте (позиции уникальны, номер не сравнивается)
+    found.sort()
+    return found
+
+
 def _split_by_articles(text: str) -> Dict[str, str]:
     """
     Split text by articles - each article contains all its edits as one fragment
@@ -291,176 +575,124 @@ def _split_by_articles(text: str) -> Dict[str, str]:
     """
     articles = {}
     
-    # Расширенные паттерны для поиска статей с учетом всех склонений
-    article_patterns = [
-        # Заголовки статей
-        r'^Статья\s+(\d+(?:\.\d+)?)',           # "Статья 1", "Статья 11.3"
-        r'^статья\s+(\d+(?:\.\d+)?)',           # "статья 1" (lowercase)
-        r'^СТАТЬЯ\s+(\d+(?:\.\d+)?)',           # "СТАТЬЯ 1" (uppercase)
-        
-        # Ссылки на статьи в разных падежах (включая середину строки)
-        r'в\s+статье\s+(\d+(?:\.\d+)?)',        # "в статье 11"
-        r'В\s+статье\s+(\d+(?:\.\d+)?)',        # "В статье 11"
-        r'статьи\s+(\d+(?:\.\d+)?)',            # "статьи 6.1"
-        r'Статьи\s+(\d+(?:\.\d+)?)',            # "Статьи 6.1"
-        r'статью\s+(\d+(?:\.\d+)?)',            # "статью 11.3"
-        r'Статью\s+(\d+(?:\.\d+)?)',            # "Статью 11.3"
-        r'статьей\s+(\d+(?:\.\d+)?)',           # "статьей 11.3"
-        r'Статьей\s+(\d+(?:\.\d+)?)',           # "Статьей 11.3"
-        r'статьях\s+(\d+(?:\.\d+)?)',           # "статьях 11.3"
-        r'Статьях\s+(\d+(?:\.\d+)?)',           # "Статьях 11.3"
-        r'статей\s+(\d+(?:\.\d+)?)',            # "статей 11.3"
-        r'Статей\s+(\d+(?:\.\d+)?)',            # "Статей 11.3"
-        
-        # Сокращения (включая середину строки)
-        r'ст\.\s*(\d+(?:\.\d+)?)',              # "ст. 1"
-        r'Ст\.\s*(\d+(?:\.\d+)?)',              # "Ст. 1"
-        r'СТ\.\s*(\d+(?:\.\d+)?)',              # "СТ. 1"
-        
-        # С двоеточием или тире
-        r'^Статья\s+(\d+(?:\.\d+)?)\s*[:\-]',    # "Статья 1:", "Статья 1-"
-        r'^статья\s+(\d+(?:\.\d+)?)\s*[:\-]',    # "статья 1:", "статья 1-" (lowercase)
-        r'^(\d+(?:\.\d+)?)\s*[:\-]',            # "1:", "11.3-" (just number)
-        
-        # Нумерованные пункты с упоминанием статей
-        r'^\d+\)\s+в\s+статье\s+(\d+(?:\.\d+)?)',  # "1) в статье 6.1"
-        r'^\d+\)\s+в\s+пункте\s+\d+\s+статьи\s+(\d+(?:\.\d+)?)',  # "1) в пункте 7 статьи 6.1"
-        r'^\d+\)\s+в\s+пункте\s+\d+\s+статьи\s+(\d+(?:\.\d+)?)',  # "1) в пункте 2 статьи 11.2"
-    ]
-    
     # Найти все упоминания статей в тексте
-    found_articles = set()
     article_positions = {}  # Позиции начала каждой статьи
+    article_priorities = {}  # Приоритет маркера, давшего позицию
+    _scan_article_markers(text, article_priorities, article_positions)
     
-    for pattern in article_patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
-            article_num = match.group(1)
-            found_articles.add(article_num)
-            # Сохраняем позицию первого упоминания статьи
-            if article_num not in article_positions:
-                article_positions[article_num] = match.start()
-    
-    print(f"[Parsing] Found article references: {sorted(found_articles)}")
+    sorted_articles = _order_found_articles(article_priorities, article_positions)
     
-    if found_articles:
-        # Сортируем статьи по позиции в тексте
-        sorted_articles = sorted(found_articles, key=lambda x: article_positions[x])
+    # Разделяем текст по статьям
+    for i, (start_pos, article_num) in enumerate(sorted_articles):
+        # Если это первая статья, включаем весь текст до неё
+        if i == 0:
+            start_pos = 0
+        
+        # Определяем конец статьи (начало следующей или конец текста)
+        if i + 1 < len(sorted_articles):
+            end_pos = sorted_articles[i + 1][0]
+        else:
+            end_pos = len(text)
         
-        # Разделяем текст по статьям
-        for i, article_num in enumerate(sorted_articles):
-            start_pos = article_positions[article_num]
-            
-            # Определяем конец статьи (начало следующей или конец текста)
-            if i + 1 < len(sorted_articles):
-                next_article = sorted_articles[i + 1]
-                end_pos = article_positions[next_article]
-            else:
-                end_pos = len(text)
-            
-            # Извлекаем содержимое статьи
-            article_content = text[start_pos:end_pos].strip()
-            
-            # Если это первая статья, включаем весь текст до неё
-            if i == 0:
-                # Находим начало первого упоминания статьи
-                first_mention_pos = article_positions[article_num]
-                # Включаем весь текст от начала до конца статьи
-                article_content = text[:end_pos].strip()
-            
-            articles[article_num] = article_content
-            print(f"[Parsing] Article {article_num}: {len(article_content)} characters")
-    
-    # Если статьи не найдены, попробуем найти ссылки на статьи в тексте
-    if not articles:
-        print(f"[Parsing] No article headers found, searching for article references...")
-        articles = _extract_articles_from_text(text)
+        # Извлекаем содержимое статьи
+        article_content = text[start_pos:end_pos].strip()
+        
+        articles[article_num] = article_content
+        logger.debug("[Parsing] Article %s: %d characters", article_num, len(article_content))
     
     # Если всё ещё не найдены статьи, обрабатываем весь текст как неизвестный
     if not articles:
         articles["unknown"] = text.strip()
-        print(f"[Parsing] No articles found, treating as unknown")
+        logger.debug("[Parsing] No articles found, treating as unknown")
     
-    print(f"[Parsing] Found {len(articles)} articles: {list(articles.keys())}")
+    logger.debug("[Parsing] Found %d articles: %s", len(articles), list(articles))
     return articles
 
 
-def _extract_articles_from_text(text: str) -> Dict[str, str]:
+def _slice_paragraphs(paragraphs: List[str], start, end) -> str:
     """
-    Extract articles from text by finding article references when no headers are found
-    Now supports all declensions of the word "статья"
+    Equivalent of '\n'.join(paragraphs)[start:end] for (paragraph_index, offset)
+    positions, without building the joined text
+    """
+    start_index, start_offset = start
+    end_index, end_offset = end
+    if start_index == end_index:
+        return paragraphs[start_index][start_offset:end_offset]
+    
+    parts = [paragraphs[start_index][start_offset:]]
+    parts.extend(paragraphs[start_index + 1:end_index])
+    if end_index < len(paragraphs):
+        parts.append(paragraphs[end_index][:end_offset])
+    return '\n'.join(parts)
+
+
+def _split_docx_by_articles(content: bytes) -> Optional[Dict[str, str]]:
+    """
+    Split a DOCX edits file by articles in the same pass that extracts its text
+    
+    Same result as _split_by_articles(_extract_text_from_docx(content)), but
+    article markers are matched paragraph by paragraph (each together with the
+    next one, for markers spanning the break) while the document is streamed,
+    so the whole text is never joined into one string and scanned again.
     
-    Args:
-        text: Full text content
-        
     Returns:
-        Dictionary with article numbers as keys and content as values
+        Articles dictionary, or None if the file does not look like legal
+        text with articles
     """
-    articles = {}
+    paragraphs = []
+    article_positions = {}
+    article_priorities = {}
+    has_legal_text = False
+    previous_folded = None
+    resume = 0
     
-    # Расширенные паттерны для поиска ссылок на статьи в тексте
-    article_patterns = [
-        r'статья\s+(\d+(?:\.\d+)?)',           # "статья 1", "статья 11.3"
-        r'Статья\s+(\d+(?:\.\d+)?)',           # "Статья 1", "Статья 11.3"
-        r'СТАТЬЯ\s+(\d+(?:\.\d+)?)',           # "СТАТЬЯ 1", "СТАТЬЯ 11.3"
-        r'статье\s+(\d+(?:\.\d+)?)',           # "в статье 1"
-        r'Статье\s+(\d+(?:\.\d+)?)',           # "В статье 1"
-        r'статьи\s+(\d+(?:\.\d+)?)',           # "статьи 1"
-        r'Статьи\s+(\d+(?:\.\d+)?)',           # "Статьи 1"
-        r'статью\s+(\d+(?:\.\d+)?)',           # "статью 1"
-        r'Статью\s+(\d+(?:\.\d+)?)',           # "Статью 1"
-        r'статьей\s+(\d+(?:\.\d+)?)',          # "статьей 1"
-        r'Статьей\s+(\d+(?:\.\d+)?)',          # "Статьей 1"
-        r'статьях\s+(\d+(?:\.\d+)?)',          # "статьях 1"
-        r'Статьях\s+(\d+(?:\.\d+)?)',          # "Статьях 1"
-        r'статей\s+(\d+(?:\.\d+)?)',           # "статей 1"
-        r'Статей\s+(\d+(?:\.\d+)?)',           # "Статей 1"
-        r'ст\.\s*(\d+(?:\.\d+)?)',             # "ст. 1"
-        r'Ст\.\s*(\d+(?:\.\d+)?)',             # "Ст. 1"
-        r'СТ\.\s*(\d+(?:\.\d+)?)',             # "СТ. 1"
-    ]
-    
-    # Найти все номера статей, упомянутых в тексте
-    found_articles = set()
-    article_positions = {}  # Позиции упоминаний статей
-    
-    for pattern in article_patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        for match in matches:
-            article_num = match.group(1)
-            found_articles.add(article_num)
-            # Сохраняем позицию первого упоминания
-            if article_num not in article_positions:
-                article_positions[article_num] = match.start()
-    
-    # Если найдены ссылки на статьи, создаём записи для них
-    if found_articles:
-        print(f"[Parsing] Found article references: {sorted(found_articles)}")
-        
-        # Сортируем статьи по позиции в тексте
-        sorted_articles = sorted(found_articles, key=lambda x: article_positions[x])
-        
-        # Разделяем текст по статьям
-        for i, article_num in enumerate(sorted_articles):
-            start_pos = article_positions[article_num]
-            
-            # Определяем конец статьи (начало следующей или конец текста)
-            if i + 1 < len(sorted_articles):
-                next_article = sorted_articles[i + 1]
-                end_pos = article_positions[next_article]
-            else:
-                end_pos = len(text)
-            
-            # Извлекаем содержимое статьи
-            article_content = text[start_pos:end_pos].strip()
-            
-            # Если это первая статья, включаем весь текст до неё
-            if i == 0:
-                article_content = text[:end_pos].strip()
-            
-            articles[article_num] = article_content
-            print(f"[Parsing] Created article {article_num} with {len(article_content)} characters")
+    try:
+        for text in _iter_docx_paragraphs(content):
+            text = text.strip()
+            if not text:
+                continue
+            if not has_legal_text:
+                has_legal_text = 'Статья' in text or 'статья' in text or 'Внести' in text
+            folded = _fold_case(text)
+            if previous_folded is not None:
+                resume = _scan_paragraph_markers(
+                    previous_folded, folded, resume, len(paragraphs) - 1, article_priorities, article_positions
+                )
+            paragraphs.append(text)
+            previous_folded = folded
+    except Exception as e:
+        logger.warning("Error extracting text from DOCX: %s", e)
+        return None
+    
+    if previous_folded is not None:
+        _scan_paragraph_markers(
+            previous_folded, None, resume, len(paragraphs) - 1, article_priorities, article_positions
+        )
     
+    logger.debug("[Parsing] Extracted %d paragraphs from DOCX", len(paragraphs))
+    
+    # Check if the content looks like legal text with articles
+    if not has_legal_text:
+        return None
+    
+    sorted_articles = _order_found_articles(article_priorities, article_positions)
+    if not sorted_articles:
+        logger.debug("[Parsing] No articles found, treating as unknown")
+        return {"unknown": '\n'.join(paragraphs).strip()}
+    
+    articles = {}
+    text_end = (len(paragraphs), 0)
+    for i, (start_pos, article_num) in enumerate(sorted_articles):
+        # Первая статья включает весь текст до неё
+        if i == 0:
+            start_pos = (0, 0)
+        end_pos = sorted_articles[i + 1][0] if i + 1 < len(sorted_articles) else text_end
+        article_content = _slice_paragraphs(paragraphs, start_pos, end_pos).strip()
+        
+        articles[article_num] = article_content
+        logger.debug("[Parsing] Article %s: %d characters", article_num, len(article_content))
+    
+    logger.debug("[Parsing] Found %d articles: %s", len(articles), list(articles))
     return articles
 
 
@@ -475,38 +707,15 @@ def _split_into_edits(text: str) -> List[str]:
     """
     edits = []
     
-    # Common patterns that indicate start of a new edit
-    edit_start_patterns = [
-        r'^\d+[\.\)]\s*',  # Numbered lists: "1. ", "2) "
-        r'^[а-я]\)\s*',    # Lettered lists: "а) ", "б) "
-        r'^[-•]\s*',       # Bullet points: "- ", "• "
-        r'^(В\s+статье|Исключить|Дополнить|Заменить|Изложить|Внести)',  # Common edit verbs
-    ]
-    
-    lines = text.split('\n')
-    current_edit = []
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        # Check if this line starts a new edit
-        is_new_edit = any(re.match(pattern, line, re.IGNORECASE) for pattern in edit_start_patterns)
-        
-        if is_new_edit and current_edit:
-            # Save previous edit
-            edit_text = '\n'.join(current_edit).strip()
-            if edit_text:
-                edits.append(edit_text)
-            current_edit = [line]
-        else:
-            # Continue current edit
-            current_edit.append(line)
+    # Границы правок находим одним проходом; текст до первой границы - тоже правка
+    boundaries = [0]
+    boundaries.extend(match.start() for match in _EDIT_START_RE.finditer(_fold_case(text)))
+    boundaries.append(len(text))
     
-    # Add last edit
-    if current_edit:
-        edit_text = '\n'.join(current_edit).strip()
+    for start_pos, end_pos in zip(boundaries, boundaries[1:]):
+        edit_text = '\n'.join(
+            line for line in map(str.strip, text[start_pos:end_pos].split('\n')) if line
+        )
         if edit_text:
             edits.append(edit_text)
     
@@ -518,6 +727,34 @@ def _split_into_edits(text: str) -> List[str]:
     return edits
 
 
+def _classify_edit(edit: str) -> Optional[str]:
+    """Article number an edit refers to, or None if it has no article reference"""
+    found_articles = {match.group(1) for match in _ARTICLE_REF_RE.finditer(edit.lower())}
+    
+    # Handle multiple articles in one edit
+    if len(found_articles) > 1:
+        logger.debug("[Parsing] Edit references multiple articles: %s", found_articles)
+    
+    # Add to the first found article (could be improved to split the edit)
+    return next(iter(found_articles), None)
+
+
+def _classify_edits(edits: List[str]) -> List[Optional[str]]:
+    """
+    Classify edits by article, in a process pool for large edit lists
+    
+    Regex classification is CPU-bound and independent per edit. Small lists and
+    daemonic processes (Celery prefork children cannot fork a pool) stay serial.
+    """
+    if len(edits) < PARALLEL_GROUPING_MIN_EDITS or multiprocessing.current_process().daemon:
+        return [_classify_edit(edit) for edit in edits]
+    
+    workers = os.cpu_count() or 1
+    chunksize = max(1, len(edits) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_classify_edit, edits, chunksize=chunksize))
+
+
 def _group_edits_by_article(edits: List[str]) -> Dict[str, List[str]]:
     """
     Group edits by article number using regex patterns
@@ -525,64 +762,15 @@ def _group_edits_by_article(edits: List[str]) -> Dict[str, List[str]]:
     """
     grouped_edits = {}
     
-    # Расширенные паттерны для поиска ссылок на статьи (упорядочены по специфичности)
-    article_patterns = [
-        r'статья\s+(\d+(?:\.\d+)?)',           # "статья 5", "статья 11.3"
-        r'Статья\s+(\d+(?:\.\d+)?)',           # "Статья 5", "Статья 11.3"
-        r'СТАТЬЯ\s+(\d+(?:\.\d+)?)',           # "СТАТЬЯ 5", "СТАТЬЯ 11.3"
-        r'статье\s+(\d+(?:\.\d+)?)',           # "в статье 5"
-        r'Статье\s+(\d+(?:\.\d+)?)',           # "В статье 5"
-        r'статьи\s+(\d+(?:\.\d+)?)',           # "статьи 5"
-        r'Статьи\s+(\d+(?:\.\d+)?)',           # "Статьи 5"
-        r'статью\s+(\d+(?:\.\d+)?)',           # "статью 5"
-        r'Статью\s+(\d+(?:\.\d+)?)',           # "Статью 5"
-        r'статьей\s+(\d+(?:\.\d+)?)',          # "статьей 5"
-        r'Статьей\s+(\d+(?:\.\d+)?)',          # "Статьей 5"
-        r'статьях\s+(\d+(?:\.\d+)?)',          # "статьях 5"
-        r'Статьях\s+(\d+(?:\.\d+)?)',          # "Статьях 5"
-        r'статей\s+(\d+(?:\.\d+)?)',           # "статей 5"
-        r'Статей\s+(\d+(?:\.\d+)?)',           # "Статей 5"
-        r'ст\.\s*(\d+(?:\.\d+)?)',             # "ст. 5"
-        r'Ст\.\s*(\d+(?:\.\d+)?)',             # "Ст. 5"
-        r'СТ\.\s*(\d+(?:\.\d+)?)',             # "СТ. 5"
-    ]
-    
-    for edit in edits:
-        article_found = False
-        found_articles = set()
-        
-        # Try to find article numbers in the edit text
-        for pattern in article_patterns:
-            matches = re.finditer(pattern, edit, re.IGNORECASE)
-            for match in matches:
-                article_num = match.group(1)
-                found_articles.add(article_num)
-        
-        # Handle multiple articles in one edit
-        if len(found_articles) > 1:
-            print(f"[Parsing] Edit references multiple articles: {found_articles}")
-            # Add to the first found article (could be improved to split the edit)
-            article_num = list(found_articles)[0]
-            if article_num not in grouped_edits:
-                grouped_edits[article_num] = []
-            grouped_edits[article_num].append(edit)
-            article_found = True
-        elif len(found_articles) == 1:
-            article_num = list(found_articles)[0]
-            if article_num not in grouped_edits:
-                grouped_edits[article_num] = []
-            grouped_edits[article_num].append(edit)
-            article_found = True
-        
+    for edit, article_num in zip(edits, _classify_edits(edits)):
         # If no article found, add to unknown
-        if not article_found:
-            if "unknown" not in grouped_edits:
-                grouped_edits["unknown"] = []
-            grouped_edits["unknown"].append(edit)
+        # (interned here, not in _classify_edit: pool results arrive unpickled)
+        article_key = sys.intern(article_num) if article_num else "unknown"
+        grouped_edits.setdefault(article_key, []).append(edit)
     
     # Log statistics
     known_articles = len([k for k in grouped_edits.keys() if k != "unknown"])
     unknown_count = len(grouped_edits.get("unknown", []))
-    print(f"[Parsing] Grouped edits: {known_articles} known articles, {unknown_count} unknown")
+    logger.debug("[Parsing] Grouped edits: %d known articles, %d unknown", known_articles, unknown_count)
     
     return grouped_edits
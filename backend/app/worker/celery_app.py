@@ -1,4 +1,11 @@
 from celery import Celery
+from celery.signals import (
+    after_setup_logger, worker_process_init, worker_process_shutdown, worker_shutdown
+)
+from kombu.serialization import register
+from logging.handlers import QueueHandler, QueueListener
+import orjson
+import queue
 
 import sys
 from pathlib import Path
@@ -7,6 +14,17 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from config import settings
+from database import json_serializer
+
+
+# Same wire format as "json" (application/json), encoded and decoded in C
+register(
+    "orjson",
+    json_serializer,
+    orjson.loads,
+    content_type="application/json",
+    content_encoding="utf-8",
+)
 
 celery_app = Celery(
     "legal_diff_worker",
@@ -16,13 +34,56 @@ celery_app = Celery(
 )
 
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer="orjson",
+    accept_content=["orjson", "json"],
+    result_serializer="orjson",
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
+    # LLM-bound tasks run for minutes: a busy process must not reserve more of them
+    worker_prefetch_multiplier=1,
 )
 
+
+
+# Worker log records go through a queue and are written by a listener thread,
+# so tasks never block on stdout
+_log_queue_handler = QueueHandler(queue.SimpleQueue())
+_log_handlers = []
+_log_listener = None
+
+
+def _start_log_listener():
+    # Threads do not survive fork: each pool process starts its own listener
+    # (the one inherited from the parent has no thread here and is just dropped)
+    global _log_listener
+    _log_queue_handler.queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_queue_handler.queue, *_log_handlers, respect_handler_level=True)
+    _log_listener.start()
+
+
+@after_setup_logger.connect
+def _route_logs_through_queue(logger, **kwargs):
+    _log_handlers[:] = logger.handlers
+    for handler in _log_handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(_log_queue_handler)
+    _start_log_listener()
+
+
+@worker_process_init.connect
+def _restart_log_listener(**kwargs):
+    if _log_handlers:
+        _start_log_listener()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _stop_log_listener(**kwargs):
+    # Writes out the records still queued and joins the listener thread
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
@@ -1,10 +1,18 @@
 from celery import Task
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session
+from celery.signals import worker_process_init
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import joinedload, scoped_session, sessionmaker
+import orjson
 import uuid
 import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 import os
+import re
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Add app directory to path for imports
@@ -12,140 +20,144 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from .celery_app import celery_app
 from config import settings
+from database import json_serializer
 from models.document import (
     WorkspaceFile, EditTarget, EditJobStatus, Article, 
     PatchedFragment, ChangeType, BaseDocument
 )
 from services.llm_service import LLMService
 
+logger = logging.getLogger(__name__)
 
-# Create sync engine for Celery tasks
-sync_engine = create_engine(settings.DATABASE_URL.replace("+asyncpg", ""))
+
+# Create sync engine for Celery tasks; JSONB columns (conflicts_json,
+# metadata_json) are encoded and decoded with orjson. Pooled connections are
+# pinged before use and recycled, so idle workers never hit a dropped one
+sync_engine = create_engine(
+    settings.DATABASE_URL.replace("+asyncpg", ""),
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=settings.DATABASE_POOL_RECYCLE,
+    json_serializer=json_serializer,
+    json_deserializer=orjson.loads
+)
+
+# One session per task run (thread-local), removed when the task returns.
+# Loaded rows stay usable after chunked commits without reloading
+TaskSession = scoped_session(sessionmaker(bind=sync_engine, expire_on_commit=False))
+
+
+@worker_process_init.connect
+def _reset_engine_pool(**kwargs):
+    # Connections opened before fork belong to the parent process
+    sync_engine.dispose(close=False)
+
+
+# LLMService shared by all tasks of a worker process: the parse chain and the
+# apply-result cache survive between tasks
+_llm_service = None
+_llm_service_lock = threading.Lock()
+
+
+def _get_llm_service() -> LLMService:
+    """Lazily build the worker's LLMService once per process"""
+    global _llm_service
+    if _llm_service is None:
+        with _llm_service_lock:
+            if _llm_service is None:
+                _llm_service = LLMService()
+    return _llm_service
+
+
+@worker_process_init.connect
+def _init_llm_service(**kwargs):
+    _get_llm_service()
+
+
+# Runs blocking LLM calls of a task in the background while the task keeps
+# using its database session
+_llm_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
+
+# Phase 2 commits fragments in chunks of this size, or when this many seconds
+# have passed since the last commit, whichever comes first
+PHASE2_COMMIT_BATCH_SIZE = 20
+PHASE2_COMMIT_INTERVAL = 2.0
+
+# Article number in a lowercased edit address, one alternation for all forms;
+# the group number is the priority of the form:
+# 1 - "статья 6.1", 2 - "в статье 11.3", 3 - "ст. 25", 4 - "статьи 7"
+_ADDRESS_ARTICLE_RE = re.compile(
+    r'статья\s+(\d+(?:\.\d+)?)'
+    r'|в\s+статье\s+(\d+(?:\.\d+)?)'
+    r'|ст\.\s*(\d+(?:\.\d+)?)'
+    r'|статьи\s+(\d+(?:\.\d+)?)'
+)
+
+# Article block header in raw edits text for _extract_instructions_regex
+# ("Статья N" or "В статье N" plus separator); a block runs up to the next header
+_ARTICLE_BLOCK_HEADER_RE = re.compile(
+    r'(?:В\s+статье|статья)\s+(\d+(?:\.\d+)?)\s*[:\-]?\s*',
+    re.IGNORECASE
+)
+
+# Edit wording that marks text without article headers as general changes
+_EDIT_KEYWORDS_RE = re.compile(r'изменени|дополнить|исключить', re.IGNORECASE)
+
+# Article block header standing at the start of a line ("Статья 5:") — the
+# structured edits format that Phase 1 can group without the LLM
+_LINE_ARTICLE_HEADER_RE = re.compile(
+    r'^[^\S\n]*(?:В\s+статье|статья)\s+\d+(?:\.\d+)?\s*[:\-]?',
+    re.IGNORECASE | re.MULTILINE
+)
+# Structured input must name at least this many articles to skip the LLM
+STRUCTURED_MIN_ARTICLES = 2
 
 
 class DatabaseTask(Task):
     """Base task with database session"""
-    _session = None
+    # One event loop per worker process, shared by all tasks: keeps the shared
+    # LLM client's connection pool usable (and warm) between task runs
+    _loop = None
+    
+    @property
+    def loop(self):
+        loop = DatabaseTask._loop
+        if loop is None or loop.is_closed():
+            loop = DatabaseTask._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+        return loop
     
     @property
     def session(self):
-        if self._session is None:
-            self._session = Session(sync_engine)
-        return self._session
+        return TaskSession()
     
     def after_return(self, *args, **kwargs):
-        if self._session is not None:
-            self._session.close()
-            self._session = None
-    
-    def _fuzzy_match_address(self, address: str, tax_units):
-        """Simple fuzzy matching for addresses"""
-        address_lower = address.lower()
-        
-        # Try to extract numbers from address
-        import re
-        numbers = re.findall(r'\d+', address)
-        
-        for unit in tax_units:
-            if not unit.breadcrumbs_path:
-                continue
-            
-            path_lower = unit.breadcrumbs_path.lower()
-            
-            # Check if address keywords are in breadcrumbs
-            if "статья" in address_lower and "статья" in path_lower:
-                # Try to match article number
-                for num in numbers:
-                    if f"статья {num}" in path_lower or f"статья {num}." in path_lower:
-                        return unit.id
-            
-            # Similar checks for other levels...
-        
-        return None
-    
-    def _determine_target_article(self, address: str, document_structure: dict, llm_service, loop):
-        """Determine which article the edit targets using simple regex matching"""
-        if not document_structure:
-            return None
-            
-        # Extract article numbers from available structure
-        available_articles = list(document_structure.keys())
-        
-        if not available_articles:
-            return None
-        
-        # Use simple regex matching instead of LLM to avoid API issues
-        import re
-        
-        # Extract article number from address using regex
-        # Patterns: "статья 6.1", "в статье 11.3", "статья 25"
-        patterns = [
-            r'статья\s+(\d+(?:\.\d+)?)',
-            r'в\s+статье\s+(\d+(?:\.\d+)?)',
-            r'ст\.\s*(\d+(?:\.\d+)?)',
-            r'статьи\s+(\d+(?:\.\d+)?)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, address.lower())
-            if match:
-                article_num = match.group(1)
-                if article_num in available_articles:
-                    print(f"[Phase1] Found article {article_num} in address: {address}")
-                    return article_num
-        
-        print(f"[Phase1] Could not determine article from address: {address}")
-        return None
-
+        TaskSession.remove()
 
-def _group_edits_by_article(self, edit_instructions: list, document_structure: dict) -> tuple:
-    """Group edit instructions by target article"""
-    article_groups = {}
-    ungrouped_edits = []
-    
-    for instruction_data in edit_instructions:
-        address = instruction_data.get("address", "")
-        target_article = self._determine_target_article(address, document_structure, None, None)
-        
-        if target_article:
-            if target_article not in article_groups:
-                article_groups[target_article] = []
-            article_groups[target_article].append(instruction_data)
-        else:
-            ungrouped_edits.append(instruction_data)
-    
-    return article_groups, ungrouped_edits
 
-def _extract_instructions_regex(self, text: str) -> list:
+def _extract_instructions_regex(text: str) -> list:
     """Extract edit instructions using regex patterns"""
-    import re
-    
     instructions = []
     
-    # Look for article patterns
-    article_patterns = [
-        r'Статья\s+(\d+(?:\.\d+)?)\s*[:\-]?\s*(.*?)(?=Статья\s+\d+|$)',
-        r'статья\s+(\d+(?:\.\d+)?)\s*[:\-]?\s*(.*?)(?=статья\s+\d+|$)',
-        r'В\s+статье\s+(\d+(?:\.\d+)?)\s*[:\-]?\s*(.*?)(?=В\s+статье\s+\d+|$)',
-    ]
-    
-    for pattern in article_patterns:
-        matches = re.finditer(pattern, text, re.DOTALL | re.IGNORECASE)
-        for match in matches:
-            article_num = match.group(1)
-            content = match.group(2).strip()
-            
-            if content and len(content) > 10:  # Only meaningful content
-                instructions.append({
-                    "address": f"статья {article_num}",
-                    "instruction": content[:1000],  # Limit length
-                    "full_text": content
-                })
+    # Look for article patterns: one scan for headers, blocks are the slices between them
+    headers = list(_ARTICLE_BLOCK_HEADER_RE.finditer(text))
+    for i, match in enumerate(headers):
+        article_num = match.group(1)
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        content = text[match.end():end].strip()
+        
+        if content and len(content) > 10:  # Only meaningful content
+            instructions.append({
+                "address": f"статья {article_num}",
+                "instruction": content[:1000],  # Limit length
+                "full_text": content
+            })
     
     # If no articles found, create a general instruction
     if not instructions:
         # Look for any meaningful text patterns
-        if "изменени" in text.lower() or "дополнить" in text.lower() or "исключить" in text.lower():
+        if _EDIT_KEYWORDS_RE.search(text):
             instructions.append({
                 "address": "общие изменения",
                 "instruction": text[:1000],
@@ -159,214 +171,47 @@ def _extract_instructions_regex(self, text: str) -> list:
                 "full_text": text
             })
     
-    print(f"[Phase1] Regex extracted {len(instructions)} instructions")
+    logger.debug("[Phase1] Regex extracted %d instructions", len(instructions))
     return instructions
 
-def _process_article_edits(self, article_num: str, edits: list, document_structure: dict, 
-                          tax_units: list, llm_service, loop) -> list:
-    """Process edits for a specific article"""
-    print(f"[Phase1] Processing {len(edits)} edits for article {article_num}")
-    
-    article_content = document_structure.get(article_num, {}).get('content', '')
-    article_tax_units = [unit for unit in tax_units if article_num in (unit.breadcrumbs_path or '')]
-    
-    print(f"[Phase1] Article {article_num}: {len(article_tax_units)} tax units, {len(article_content)} chars content")
-    
-    targets = []
-    
-    # If we have article content, use it for more precise matching
-    if article_content and llm_service and loop:
-        print(f"[Phase1] Using article-specific content for LLM processing")
-        try:
-            # Process all edits for this article together with the article content
-            article_edits_text = '\n\n'.join(edits)
-            
-            # Use LLM to find targets within the specific article
-            matched_targets = loop.run_until_complete(
-                asyncio.wait_for(
-                    self._find_targets_in_article(
-                        article_content, 
-                        article_edits_text, 
-                        article_tax_units,
-                        llm_service
-                    ),
-                    timeout=15.0
-                )
-            )
-            
-            for target in matched_targets:
-                targets.append({
-                    "instruction": target.get("instruction", ""),
-                    "tax_unit_id": target.get("tax_unit_id"),
-                    "conflicts": target.get("conflicts", {})
-                })
-                
-        except Exception as e:
-            print(f"[Phase1] Error in article-specific processing: {e}")
-            # Fallback to individual processing
-            targets = self._process_edits_individually(edits, article_tax_units, llm_service, loop)
-    else:
-        # Fallback to individual processing
-        targets = self._process_edits_individually(edits, article_tax_units, llm_service, loop)
-    
-    return targets
-
-def _process_unknown_edits(self, edits: list, tax_units: list, llm_service, loop) -> list:
-    """Process edits where article number could not be determined"""
-    print(f"[Phase1] Processing {len(edits)} unknown edits")
-    
-    targets = []
-    
-    # For unknown edits, try to match against all tax units
-    for edit in edits:
-        print(f"[Phase1] Processing unknown edit: {edit[:100]}...")
-        
-        matched_tax_unit = None
-        if llm_service and loop and tax_units:
-            try:
-                matched_tax_unit = loop.run_until_complete(
-                    asyncio.wait_for(
-                        self._match_address_to_breadcrumbs(
-                            edit, 
-                            tax_units, 
-                            llm_service
-                        ),
-                        timeout=10.0
-                    )
-                )
-            except Exception as e:
-                print(f"[Phase1] Error matching unknown edit: {e}")
-        
-        targets.append({
-            "instruction": edit,
-            "tax_unit_id": matched_tax_unit.id if matched_tax_unit else None,
-            "conflicts": {
-                "error": "Could not match address to tax unit" if not matched_tax_unit else None,
-                "address": "неизвестно"
-            }
-        })
+def _parse_structured_edits(text: str) -> dict:
+    """
+    Group edits by article without the LLM when the text is already structured
     
-    return targets
-
-def _process_edits_individually(self, edits: list, tax_units: list, llm_service, loop) -> list:
-    """Process edits individually when article-specific processing fails"""
-    targets = []
+    Structured means every article header found by _extract_instructions_regex
+    starts its own line (no inline references such as "... в статье 6 слова ...")
+    and at least STRUCTURED_MIN_ARTICLES articles are named. Returns the same
+    {article_number: text} mapping as LLMService.parse_edits_by_articles_sync,
+    or an empty dict when the text should go through the LLM.
+    """
+    header_count = sum(1 for _ in _ARTICLE_BLOCK_HEADER_RE.finditer(text))
+    if header_count < STRUCTURED_MIN_ARTICLES:
+        return {}
+    if sum(1 for _ in _LINE_ARTICLE_HEADER_RE.finditer(text)) != header_count:
+        return {}
     
-    for edit in edits:
-        matched_tax_unit = None
-        if llm_service and loop and tax_units:
-            try:
-                matched_tax_unit = loop.run_until_complete(
-                    asyncio.wait_for(
-                        self._match_address_to_breadcrumbs(
-                            edit, 
-                            tax_units, 
-                            llm_service
-                        ),
-                        timeout=10.0
-                    )
-                )
-            except Exception as e:
-                print(f"[Phase1] Error matching edit: {e}")
-        
-        targets.append({
-            "instruction": edit,
-            "tax_unit_id": matched_tax_unit.id if matched_tax_unit else None,
-            "conflicts": {
-                "error": "Could not match address to tax unit" if not matched_tax_unit else None,
-                "address": "неизвестно"
-            }
-        })
+    parsed_edits = {}
+    for hit in _extract_instructions_regex(text):
+        match = _ADDRESS_ARTICLE_RE.match(hit["address"])
+        if not match:
+            return {}
+        article_num = match.group(1)
+        block = f"Статья {article_num}\n{hit['full_text']}"
+        parsed_edits[article_num] = (
+            f"{parsed_edits[article_num]}\n\n{block}" if article_num in parsed_edits else block
+        )
     
-    return targets
-
-async def _find_targets_in_article(self, article_content: str, edits_text: str, 
-                                  tax_units: list, llm_service) -> list:
-    """
-    Find edit targets within a specific article using LLM
-    """
-    try:
-        # Create a focused prompt for this specific article
-        prompt = f"""
-        Найди точные места в тексте статьи, к которым относятся правки.
-
-        ТЕКСТ СТАТЬИ:
-        {article_content[:8000]}  # Limit content to avoid token limits
-
-        ПРАВКИ ДЛЯ ЭТОЙ СТАТЬИ:
-        {edits_text[:2000]}  # Limit edits text
-
-        Верни JSON массив с найденными целями:
-        [
-            {{
-                "instruction": "текст правки",
-                "target_text": "найденный фрагмент в статье",
-                "position": "примерное место в статье",
-                "confidence": 0.8
-            }}
-        ]
-        """
-        
-        response = await llm_service.llm.ainvoke(prompt)
-        content = response.content if hasattr(response, 'content') else str(response)
-        
-        # Parse JSON response
-        import json
-        try:
-            if "```json" in content:
-                content = re.search(r'```json\s*(\[.*?\])\s*```', content, re.DOTALL)
-                if content:
-                    content = content.group(1)
-            
-            targets = json.loads(content)
-            
-            # Match targets to tax units
-            matched_targets = []
-            for target in targets:
-                instruction = target.get("instruction", "")
-                target_text = target.get("target_text", "")
-                
-                # Find best matching tax unit
-                best_match = None
-                best_score = 0
-                
-                for tax_unit in tax_units:
-                    if target_text.lower() in tax_unit.current_version.text_content.lower():
-                        score = len(target_text) / len(tax_unit.current_version.text_content)
-                        if score > best_score:
-                            best_score = score
-                            best_match = tax_unit
-                
-                matched_targets.append({
-                    "instruction": instruction,
-                    "tax_unit_id": best_match.id if best_match else None,
-                    "conflicts": {
-                        "error": "Could not match to tax unit" if not best_match else None,
-                        "target_text": target_text,
-                        "confidence": target.get("confidence", 0)
-                    }
-                })
-            
-            return matched_targets
-            
-        except json.JSONDecodeError as e:
-            print(f"[Phase1] Error parsing LLM response: {e}")
-            return []
-            
-    except Exception as e:
-        print(f"[Phase1] Error in _find_targets_in_article: {e}")
-        return []
+    return parsed_edits if len(parsed_edits) >= STRUCTURED_MIN_ARTICLES else {}
 
 @celery_app.task(base=DatabaseTask, bind=True)
 def phase1_find_targets_approved(self, user_id: str, document_id: int, approved_articles: dict):
     """
     Process pre-approved edits by articles
     """
-    print(f"[Phase1-Approved] Starting for document_id={document_id}, user_id={user_id}")
+    logger.info("[Phase1-Approved] Starting for document_id=%s, user_id=%s", document_id, user_id)
     
     try:
         # Get document
-        from models.document import BaseDocument, TaxUnit, EditTarget, EditJobStatus
         result = self.session.execute(
             select(BaseDocument).where(
                 BaseDocument.id == document_id,
@@ -379,29 +224,17 @@ def phase1_find_targets_approved(self, user_id: str, document_id: int, approved_
         
         # Get document structure
         document_structure = document.structure or {}
-        print(f"[Phase1-Approved] Document structure: {len(document_structure)} articles")
-        
-        # Get tax units
-        tax_units = self.session.execute(
-            select(TaxUnit).where(TaxUnit.base_document_id == document_id)
-        )
-        tax_units = tax_units.scalars().all()
-        print(f"[Phase1-Approved] Found {len(tax_units)} tax units")
+        logger.debug("[Phase1-Approved] Document structure: %d articles", len(document_structure))
         
         # Process each approved article
         all_created_targets = []
+        new_targets = []
         
         for article_num, article_content in approved_articles.items():
             if article_num == "unknown":
                 continue
                 
-            print(f"[Phase1-Approved] Processing article {article_num}")
-            
-            # Find tax units for this article
-            article_tax_units = [
-                unit for unit in tax_units 
-                if article_num in (unit.breadcrumbs_path or '')
-            ]
+            logger.debug("[Phase1-Approved] Processing article %s", article_num)
             
             # Create edit targets for this article
             edit_target = EditTarget(
@@ -417,16 +250,18 @@ def phase1_find_targets_approved(self, user_id: str, document_id: int, approved_
                     "content_length": len(article_content)
                 }
             )
-            self.session.add(edit_target)
+            new_targets.append(edit_target)
             all_created_targets.append({
                 "instruction": article_content,
                 "article": article_num,
                 "tax_unit_id": None
             })
         
+        # One multi-row INSERT, no unit-of-work bookkeeping per target
+        self.session.bulk_save_objects(new_targets)
         self.session.commit()
         
-        print(f"[Phase1-Approved] SUCCESS: Created {len(all_created_targets)} targets")
+        logger.info("[Phase1-Approved] SUCCESS: Created %d targets", len(all_created_targets))
         return {
             "status": "success",
             "targets_created": len(all_created_targets),
@@ -436,11 +271,11 @@ def phase1_find_targets_approved(self, user_id: str, document_id: int, approved_
         
     except Exception as e:
         self.session.rollback()
-        print(f"[Phase1-Approved] ERROR: {e}")
+        logger.error("[Phase1-Approved] ERROR: %s", e)
         return {"error": str(e)}
 
 
-@celery_app.task(base=DatabaseTask, bind=True)
+@celery_app.task(base=DatabaseTask, bind=True, queue="llm")
 def phase1_find_targets(self, workspace_file_id: int, user_id: str):
     """
     FR-4 Phase 1: Find edit targets (LLM VERSION)
@@ -451,141 +286,161 @@ def phase1_find_targets(self, workspace_file_id: int, user_id: str):
     user_uuid = uuid.UUID(user_id)
     
     try:
-        print(f"[Phase1] Starting LLM-PARSING for workspace_file_id={workspace_file_id}, user_id={user_id}")
-        
-        # Get workspace file
-        workspace_file = session.query(WorkspaceFile).filter(
-            WorkspaceFile.id == workspace_file_id,
-            WorkspaceFile.user_id == user_uuid
+        logger.info("[Phase1] Starting LLM-PARSING for workspace_file_id=%s, user_id=%s", workspace_file_id, user_id)
+        
+        # Get workspace file: only the text length at first, so the payload
+        # (and raw_payload_bytes, never used here) is not transferred on the
+        # early-return paths
+        workspace_file = session.execute(
+            select(WorkspaceFile.base_document_id, func.length(WorkspaceFile.raw_payload_text))
+            .where(
+                WorkspaceFile.id == workspace_file_id,
+                WorkspaceFile.user_id == user_uuid
+            )
         ).first()
         
         if not workspace_file:
-            print(f"[Phase1] ERROR: Workspace file {workspace_file_id} not found")
+            logger.error("[Phase1] ERROR: Workspace file %s not found", workspace_file_id)
             return {"error": "Workspace file not found"}
         
-        if not workspace_file.raw_payload_text:
-            print(f"[Phase1] ERROR: Workspace file {workspace_file_id} has no text content")
+        base_document_id, text_length = workspace_file
+        if not text_length:
+            logger.error("[Phase1] ERROR: Workspace file %s has no text content", workspace_file_id)
             return {"error": "Workspace file has no text content"}
         
-        print(f"[Phase1] Found workspace file with {len(workspace_file.raw_payload_text)} chars of text")
+        logger.debug("[Phase1] Found workspace file with %d chars of text", text_length)
         
         # Check if content is too large for LLM
-        if len(workspace_file.raw_payload_text) > 10000:
-            print(f"[Phase1] WARNING: Content is very large ({len(workspace_file.raw_payload_text)} chars), LLM may timeout")
+        if text_length > 10000:
+            logger.warning("[Phase1] WARNING: Content is very large (%d chars), LLM may timeout", text_length)
         
-        # Get base document and its structure
+        # Get base document before any LLM work is started
         base_document = session.query(BaseDocument).filter(
-            BaseDocument.id == workspace_file.base_document_id
+            BaseDocument.id == base_document_id
         ).first()
         
         if not base_document:
-            print(f"[Phase1] ERROR: Base document not found")
+            logger.error("[Phase1] ERROR: Base document not found")
             return {"error": "Base document not found"}
         
-        # Get articles from document
-        articles = session.query(Article).filter(
-            Article.base_document_id == workspace_file.base_document_id
-        ).all()
-        
-        # Create article map for quick lookup
-        article_map = {article.article_number: article for article in articles}
-        print(f"[Phase1] Document has {len(articles)} articles")
+        raw_payload_text = session.execute(
+            select(WorkspaceFile.raw_payload_text).where(WorkspaceFile.id == workspace_file_id)
+        ).scalar_one()
         
-        # Parse edits using LLM
-        print(f"[Phase1] Parsing edits using LLM...")
+        # Well-formatted input ("Статья N:" blocks) is grouped deterministically
+        parsed_edits = _parse_structured_edits(raw_payload_text)
+        source = "regex_structured_parsing"
+        llm_future = None
         
-        # Use LLM to parse edits by articles
-        llm_service = LLMService()
+        if parsed_edits:
+            logger.debug("[Phase1] Structured input, skipping LLM parsing")
+        else:
+            # Parse edits using LLM
+            logger.debug("[Phase1] Parsing edits using LLM...")
+            source = "llm_structured_parsing"
+            
+            # Use LLM to parse edits by articles
+            llm_service = _get_llm_service()
+            
+            # Synchronous LLM parsing runs in a background thread while this
+            # thread loads the document articles (the session never leaves it)
+            llm_future = _llm_pool.submit(
+                llm_service.parse_edits_by_articles_sync, raw_payload_text
+            )
         
-        # Use synchronous LLM parsing
+        # Get articles from document
         try:
-            parsed_edits = llm_service.parse_edits_by_articles_sync(workspace_file.raw_payload_text)
-        except Exception as e:
-            print(f"[Phase1] Error during LLM operation: {e}")
-            parsed_edits = {}
+            articles = session.query(Article).filter(
+                Article.base_document_id == base_document_id
+            ).all()
+        except Exception:
+            # The LLM pool has a single thread: wait for the call here rather
+            # than leave it running in front of the next task's submit
+            if llm_future is not None and not llm_future.cancel():
+                llm_future.exception()
+            raise
         
-        print(f"[Phase1] LLM parsing completed, result: {len(parsed_edits) if parsed_edits else 0} articles")
+        # Create article map for quick lookup
+        article_map = {article.article_number: article for article in articles}
+        logger.debug("[Phase1] Document has %d articles", len(articles))
+        
+        if llm_future is not None:
+            try:
+                parsed_edits = llm_future.result()
+            except Exception as e:
+                logger.warning("[Phase1] Error during LLM operation: %s", e)
+                parsed_edits = {}
+            
+            logger.debug("[Phase1] LLM parsing completed, result: %d articles", len(parsed_edits) if parsed_edits else 0)
         
         if not parsed_edits:
-            print(f"[Phase1] ERROR: LLM failed to parse edits")
+            logger.error("[Phase1] ERROR: LLM failed to parse edits")
             return {"error": "LLM failed to parse edits from file"}
         
-        print(f"[Phase1] Parsed {len(parsed_edits)} articles: {list(parsed_edits.keys())}")
+        logger.debug("[Phase1] Parsed %d articles: %s", len(parsed_edits), list(parsed_edits))
         
         # Check if we have any articles to process
         if not parsed_edits:
-            print(f"[Phase1] WARNING: No articles found in file")
+            logger.warning("[Phase1] WARNING: No articles found in file")
             return {"error": "No articles found in file"}
         
-        # Process each article
-        all_created_targets = []
-        
+        # Build rows for all articles; duplicates are skipped by the database
+        target_rows = []
         for article_num, article_content in parsed_edits.items():
             if article_num == "unknown":
                 continue
-                
-            print(f"[Phase1] Processing article {article_num}")
             
-            # Проверить, не создана ли уже задача для этой статьи
-            # 1) Если нашли article_id – считаем уникальным по (user, workspace_file, article_id)
-            # 2) Если article_id нет – по текстовому номеру статьи в conflicts_json['article']
-            existing_target = None
-            # Найдём article_id заранее для корректной проверки
             article = article_map.get(article_num)
             article_id = article.id if article else None
-
-            if article_id is not None:
-                existing_target = session.query(EditTarget).with_for_update().filter(
-                    EditTarget.workspace_file_id == workspace_file_id,
-                    EditTarget.user_id == user_uuid,
-                    EditTarget.article_id == article_id
-                ).first()
-            else:
-                from sqlalchemy import text
-                existing_target = session.query(EditTarget).with_for_update().filter(
-                    EditTarget.workspace_file_id == workspace_file_id,
-                    EditTarget.user_id == user_uuid
-                ).filter(
-                    EditTarget.conflicts_json['article'].astext == article_num
-                ).first()
-            
-            if existing_target:
-                print(f"[Phase1] Target for article {article_num} already exists (instruction_text match), skipping")
-                continue
-            
-            # Find article by number (already resolved above)
-            
-            print(f"[Phase1] Article {article_num}: {'found' if article else 'NOT FOUND'}")
+            logger.debug("[Phase1] Article %s: %s", article_num, "found" if article else "NOT FOUND")
             
             # If article is found, status should be pending (ready to apply)
             # If article is NOT found, status should be review (needs manual confirmation)
             target_status = EditJobStatus.pending if article_id else EditJobStatus.review
             
-            # Create edit target for this article
-            edit_target = EditTarget(
-                user_id=user_uuid,
-                workspace_file_id=workspace_file_id,
-                status=target_status,
-                instruction_text=article_content,
-                article_id=article_id,
-                conflicts_json={
+            target_rows.append({
+                "user_id": user_uuid,
+                "workspace_file_id": workspace_file_id,
+                "status": target_status,
+                "instruction_text": article_content,
+                "article_id": article_id,
+                "conflicts_json": {
                     "article": article_num,
-                    "source": "llm_structured_parsing",
+                    "source": source,
                     "content_length": len(article_content),
                     "structured_format": True,
                     "auto_confirmed": article_id is not None
                 }
-            )
-            session.add(edit_target)
-            all_created_targets.append({
-                "instruction": article_content,
-                "article": article_num,
-                "tax_unit_id": None
             })
         
+        # Уникальность задачи обеспечивают индексы edit_target:
+        # 1) по (user, workspace_file, article_id), если article_id найден
+        # 2) по (user, workspace_file, conflicts_json['article']), если нет
+        # 3) по нормализованному тексту правки
+        # Уже существующие задачи пропускаются одним INSERT ... ON CONFLICT DO NOTHING
+        all_created_targets = []
+        if target_rows:
+            inserted = session.execute(
+                pg_insert(EditTarget)
+                .values(target_rows)
+                .on_conflict_do_nothing()
+                .returning(EditTarget.conflicts_json['article'].astext, EditTarget.instruction_text)
+            ).all()
+            all_created_targets = [
+                {
+                    "instruction": instruction_text,
+                    "article": article_num,
+                    "tax_unit_id": None
+                }
+                for article_num, instruction_text in inserted
+            ]
+            skipped = len(target_rows) - len(inserted)
+            if skipped:
+                logger.debug("[Phase1] %d targets already exist, skipped", skipped)
+        
         session.commit()
         
-        print(f"[Phase1] SUCCESS: Created {len(all_created_targets)} targets")
+        logger.info("[Phase1] SUCCESS: Created %d targets", len(all_created_targets))
         return {
             "status": "success",
             "targets_created": len(all_created_targets),
@@ -596,16 +451,14 @@ def phase1_find_targets(self, workspace_file_id: int, user_id: str):
     
     except Exception as e:
         session.rollback()
-        print(f"[Phase1] EXCEPTION: {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[Phase1] EXCEPTION: %s: %s", type(e).__name__, e)
         return {"error": str(e)}
     
     finally:
         session.close()
 
 
-@celery_app.task(base=DatabaseTask, bind=True)
+@celery_app.task(base=DatabaseTask, bind=True, queue="llm")
 def phase2_apply_edits(self, workspace_file_id: int, user_id: str):
     """
     FR-4 Phase 2: Apply edits to confirmed targets
@@ -620,9 +473,15 @@ def phase2_apply_edits(self, workspace_file_id: int, user_id: str):
     user_uuid = uuid.UUID(user_id)
     
     try:
-        # Get all edit targets for this workspace file
+        # Get all edit targets for this workspace file that have no fragment yet,
+        # with their articles, in one query
         # Include both pending (auto-confirmed) and review (manually confirmed) targets
-        edit_targets = session.query(EditTarget).filter(
+        edit_targets = session.query(EditTarget).options(
+            joinedload(EditTarget.article)
+        ).outerjoin(
+            PatchedFragment, PatchedFragment.edit_target_id == EditTarget.id
+        ).filter(
+            PatchedFragment.id.is_(None),
             EditTarget.workspace_file_id == workspace_file_id,
             EditTarget.user_id == user_uuid,
             EditTarget.article_id.isnot(None),
@@ -641,42 +500,40 @@ def phase2_apply_edits(self, workspace_file_id: int, user_id: str):
             return {"error": "Workspace file not found"}
         
         # Initialize LLM service
-        llm_service = LLMService()
+        llm_service = _get_llm_service()
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        loop = self.loop
         
         applied_count = 0
         total_targets = len(edit_targets)
         
-        for target_idx, target in enumerate(edit_targets):
-            # Check if fragment already exists for this target
-            existing_fragment = session.query(PatchedFragment).filter(
-                PatchedFragment.edit_target_id == target.id
-            ).first()
-            
-            if existing_fragment:
-                print(f"[Phase2] Fragment for target {target.id} already exists, skipping")
-                continue
-            
-            # Get article
-            article = session.query(Article).filter(
-                Article.id == target.article_id
-            ).first()
-            
-            if not article:
-                continue
-            
-            before_text = article.content
-            print(f"[Phase2] Processing {target_idx + 1}/{total_targets}: Article {article.article_number} ({len(before_text)} chars)")
-            
-            # Apply edit using LLM
-            after_text = loop.run_until_complete(
-                llm_service.apply_edit_instruction(
-                    before_text=before_text,
-                    instruction=target.instruction_text
-                )
+        pending_targets = [
+            (target, target.article) for target in edit_targets if target.article
+        ]
+        
+        pending_fragments = []
+        last_commit = time.monotonic()
+        
+        def _flush_fragments():
+            # One INSERT batch, one UPDATE and one commit per chunk of fragments
+            nonlocal last_commit
+            if not pending_fragments:
+                return
+            session.bulk_save_objects(pending_fragments)
+            session.execute(
+                update(EditTarget)
+                .where(EditTarget.id.in_([fragment.edit_target_id for fragment in pending_fragments]))
+                .values(status=EditJobStatus.completed)
+                .execution_options(synchronize_session=False)
             )
+            session.commit()
+            logger.debug("[Phase2] Committed %d fragments (%d/%d)", len(pending_fragments), applied_count, total_targets)
+            pending_fragments.clear()
+            last_commit = time.monotonic()
+        
+        def _save_fragment(target, article, after_text):
+            nonlocal applied_count
+            before_text = article.content
             
             # Check if LLM returned error
             change_type = ChangeType.modified
@@ -696,17 +553,60 @@ def phase2_apply_edits(self, workspace_file_id: int, user_id: str):
                     "has_error": "[ОШИБКА:" in after_text
                 }
             )
-            session.add(patched_fragment)
-            
-            # Update target status
-            target.status = EditJobStatus.completed
+            pending_fragments.append(patched_fragment)
             applied_count += 1
-            
-            # Commit after each fragment to enable dynamic loading
-            session.commit()
-            print(f"[Phase2] Committed fragment for target {target.id} ({applied_count}/{total_targets})")
         
-        loop.close()
+        async def _apply_one(semaphore, target, article):
+            async with semaphore:
+                logger.debug("[Phase2] Processing target %s: Article %s (%d chars)", target.id, article.article_number, len(article.content))
+                after_text = await llm_service.apply_edit_instruction(
+                    before_text=article.content,
+                    instruction=target.instruction_text
+                )
+            return target, article, after_text
+        
+        async def _apply_all():
+            # LLM calls run concurrently (bounded); commits run in an executor
+            # thread so responses keep being received meanwhile. Only this
+            # coroutine touches the session, and it awaits each commit
+            semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+            tasks = [
+                loop.create_task(_apply_one(semaphore, target, article))
+                for target, article in pending_targets
+            ]
+            
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    try:
+                        target, article, after_text = await next_done
+                    except Exception as e:
+                        # Target stays pending and is retried on the next run
+                        logger.warning("[Phase2] Error applying edit: %s", e)
+                        continue
+                    
+                    _save_fragment(target, article, after_text)
+                    
+                    # Commit in chunks, but often enough for fragments to keep loading dynamically
+                    if (len(pending_fragments) >= PHASE2_COMMIT_BATCH_SIZE
+                            or time.monotonic() - last_commit >= PHASE2_COMMIT_INTERVAL):
+                        await loop.run_in_executor(None, _flush_fragments)
+            finally:
+                # The loop outlives this task: unfinished LLM calls must not
+                # resume inside the next task's run_until_complete
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        
+        apply_all = loop.create_task(_apply_all())
+        try:
+            loop.run_until_complete(apply_all)
+        except BaseException:
+            # Interrupted from outside the coroutine (e.g. SoftTimeLimitExceeded):
+            # let its cleanup cancel the LLM calls before the task exits
+            apply_all.cancel()
+            loop.run_until_complete(asyncio.gather(apply_all, return_exceptions=True))
+            raise
+        _flush_fragments()
         
         return {
             "status": "success",
@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "app"))
+
+from services.parsing import _split_by_articles
+
+
+def test_weak_reference_keeps_number_marker_on_next_line():
+    # "статья" в середине строки не должна съедать номер "5:" в начале следующей
+    text = 'Статья 1. Общие\nВнести изменения в следующие статья\n5: текст\nСтатья 6. Конец'
+    articles = _split_by_articles(text)
+    assert list(articles) == ['1', '5', '6']
+    assert articles['5'] == '5: текст'
+
+
+def test_weak_references_used_without_stronger_markers():
+    text = 'Изменения в законе: статья 3 дополняется, статье 7 придаётся новая редакция'
+    assert list(_split_by_articles(text)) == ['3', '7']
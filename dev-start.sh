@@ -106,7 +106,7 @@ echo -e "   source venv/bin/activate"
 echo -e "   ${CYAN}# Запустите Backend API:${NC}"
 echo -e "   uvicorn app.main:app --reload --host 0.0.0.0 --port 8000"
 echo -e "   ${CYAN}# В другой вкладке запустите Celery Worker:${NC}"
-echo -e "   celery -A app.worker.celery_app worker --loglevel=info"
+echo -e "   celery -A app.worker.celery_app worker --loglevel=info -Q celery,llm"
 
 echo -e "\n${GREEN}📍 Терминал 2 - Frontend (React):${NC}"
 echo -e "   cd $(pwd)/frontend"